@@ -0,0 +1,60 @@
+"""
+Accuracy and throughput of TFIDFClassifier vs HashingClassifier on
+SyntheticLogGenerator data.
+
+Usage: python -m benchmarks.compare_models [train_events] [test_events]
+"""
+import sys
+import time
+import json
+from sklearn.metrics import accuracy_score
+
+from src.generation.synthetic import SyntheticLogGenerator
+from src.models.baseline import TFIDFClassifier
+from src.models.online import HashingClassifier
+
+
+def run(train_size: int = 20000, test_size: int = 5000, stream_batch: int = 2000) -> dict:
+    gen = SyntheticLogGenerator(seed=42)
+    train_events = gen.generate_events(train_size)
+    test_events = gen.generate_events(test_size)
+    y_true = [e.attack_type for e in test_events]
+
+    results = {}
+    models = {
+        "tfidf_batch": TFIDFClassifier(),
+        "hashing_batch": HashingClassifier(),
+        "hashing_streaming": HashingClassifier(),
+    }
+    for name, model in models.items():
+        start = time.perf_counter()
+        if name == "hashing_streaming":
+            # One pass, a batch at a time, as uploads would arrive
+            for i in range(0, len(train_events), stream_batch):
+                model.partial_fit(train_events[i:i + stream_batch])
+        else:
+            model.train(train_events)
+        train_seconds = time.perf_counter() - start
+
+        texts = model._extract_features(test_events)
+        start = time.perf_counter()
+        y_pred = model.predict(texts)
+        model.predict_proba(texts)
+        predict_seconds = time.perf_counter() - start
+
+        results[name] = {
+            "accuracy": round(accuracy_score(y_true, y_pred), 4),
+            "train_seconds": round(train_seconds, 3),
+            "predict_events_per_second": round(2 * len(texts) / predict_seconds, 1),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    train_size = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    test_size = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    results = run(train_size, test_size)
+    print(f"{'model':<20}{'accuracy':>10}{'train s':>10}{'predict ev/s':>15}")
+    for name, r in results.items():
+        print(f"{name:<20}{r['accuracy']:>10}{r['train_seconds']:>10}{r['predict_events_per_second']:>15}")
+    print(json.dumps(results))
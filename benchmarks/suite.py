@@ -0,0 +1,316 @@
+"""
+Throughput and latency of the loader, rules, TF-IDF model, classification
+pipeline and API endpoints on SyntheticLogGenerator datasets.
+
+Results are written as JSON; with --baseline every metric is compared
+against a saved run and regressions beyond --threshold are flagged (exit
+status 1). Metrics named *_per_second are better when higher, everything
+else (seconds, milliseconds) when lower.
+
+Usage:
+    python -m benchmarks.suite [--sizes 10000 100000 1000000] [--output results.json]
+                               [--baseline baseline.json] [--threshold 0.25]
+                               [--save-baseline baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+if __name__ == "__main__":
+    # Before src.config reads them: keep the benchmark off the checked-in
+    # users.db and out of per-request logs
+    os.environ.setdefault(
+        "USERS_DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'users.db')}")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from src import config
+from src.generation.synthetic import SyntheticLogGenerator
+from src.ingestion.loader import DataLoader
+from src.models.baseline import TFIDFClassifier
+from src.models.pipeline import ClassificationPipeline
+from src.models.rules import RuleBasedDetector
+
+DEFAULT_SIZES = (10000, 100000, 1000000)
+# Events generated and written to disk at a time
+GENERATE_CHUNK = 50000
+# TF-IDF training is superlinear; bigger datasets train on a prefix
+DEFAULT_TRAIN_LIMIT = 50000
+# Timed requests per read endpoint
+DEFAULT_REQUESTS = 50
+DEFAULT_THRESHOLD = 0.25
+
+
+def write_datasets(size: int, workdir: str, seed: int = 42) -> Dict[str, str]:
+    """Write `size` synthetic events as CSV, a JSON array and JSON Lines."""
+    paths = {fmt: os.path.join(workdir, f"events-{size}.{fmt}") for fmt in ("csv", "json", "jsonl")}
+    gen = SyntheticLogGenerator(seed=seed)
+    with open(paths["csv"], 'w') as csv_file, open(paths["json"], 'w') as json_file, \
+            open(paths["jsonl"], 'w') as jsonl_file:
+        json_file.write("[")
+        for start in range(0, size, GENERATE_CHUNK):
+            events = gen.generate_events(min(GENERATE_CHUNK, size - start))
+            pd.DataFrame([e.model_dump() for e in events]).to_csv(csv_file, index=False, header=start == 0)
+            lines = [e.model_dump_json() for e in events]
+            json_file.write(("," if start else "") + ",".join(lines))
+            jsonl_file.write("\n".join(lines) + "\n")
+        json_file.write("]")
+    return paths
+
+
+def latency_ms(samples: List[float], prefix: str) -> Dict[str, float]:
+    ms = np.asarray(samples) * 1000
+    return {
+        f"{prefix}.p50_ms": round(float(np.percentile(ms, 50)), 3),
+        f"{prefix}.p95_ms": round(float(np.percentile(ms, 95)), 3),
+        f"{prefix}.p99_ms": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def _throughput(prefix: str, rows: int, seconds: float) -> Dict[str, float]:
+    return {
+        f"{prefix}.seconds": round(seconds, 4),
+        f"{prefix}.events_per_second": round(rows / seconds, 1) if seconds else 0.0,
+    }
+
+
+def bench_loader(paths: Dict[str, str]) -> tuple:
+    """Parse each file format; returns (metrics, events from the CSV)."""
+    results = {}
+    start = time.perf_counter()
+    events = DataLoader.load_csv(paths["csv"])
+    results.update(_throughput("loader.csv", len(events), time.perf_counter() - start))
+
+    start = time.perf_counter()
+    count = len(DataLoader.load_json(paths["json"]))
+    results.update(_throughput("loader.json", count, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    count = sum(len(chunk) for chunk in DataLoader.iter_jsonl(paths["jsonl"]))
+    results.update(_throughput("loader.jsonl", count, time.perf_counter() - start))
+    return results, events
+
+
+def bench_rules(events, rules: RuleBasedDetector) -> Dict[str, float]:
+    start = time.perf_counter()
+    rules.analyze_many(events)
+    return _throughput("rules", len(events), time.perf_counter() - start)
+
+
+def bench_model(events, train_limit: int) -> tuple:
+    """Train on a prefix, then predict every event in inference batches."""
+    model = TFIDFClassifier()
+    train_events = events[:train_limit]
+    start = time.perf_counter()
+    model.train(train_events)
+    results = {"tfidf.train_seconds": round(time.perf_counter() - start, 4), "tfidf.train_events": len(train_events)}
+
+    texts = model._extract_features(events)
+    batch_size = config.INFERENCE_BATCH_SIZE
+    samples = []
+    for i in range(0, len(texts), batch_size):
+        start = time.perf_counter()
+        model.predict_proba(texts[i:i + batch_size])
+        samples.append(time.perf_counter() - start)
+    results.update(_throughput("tfidf.predict", len(texts), sum(samples)))
+    results.update(latency_ms(samples, "tfidf.predict_batch"))
+    return results, model
+
+
+def bench_pipeline(events, rules: RuleBasedDetector, model: TFIDFClassifier) -> Dict[str, float]:
+    """Rules plus model through ClassificationPipeline, starting from a cold cache."""
+    pipeline = ClassificationPipeline(rules, model, batch_size=config.INFERENCE_BATCH_SIZE)
+    start = time.perf_counter()
+    pipeline.classify(events)
+    return _throughput("pipeline", len(events), time.perf_counter() - start)
+
+
+def _timed_requests(get: Callable, url: str, requests: int, params: Optional[dict] = None) -> List[float]:
+    get(url, params=params)  # warm-up
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        resp = get(url, params=params)
+        samples.append(time.perf_counter() - start)
+        if resp.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {resp.status_code}: {resp.text[:200]}")
+    return samples
+
+
+def bench_api(csv_path: str, model_path: str, requests: int) -> Dict[str, float]:
+    """Upload the CSV, then time the read endpoints, all in-process."""
+    from fastapi.testclient import TestClient
+    from src.api.main import app, get_current_user
+
+    results = {}
+    previous_path = config.MODEL_ARTIFACT_PATH
+    # Startup loads the artifact through the normal path
+    config.MODEL_ARTIFACT_PATH = model_path
+    app.dependency_overrides[get_current_user] = lambda: type("U", (), {"username": "benchmark"})()
+    try:
+        with TestClient(app) as client:
+            with open(csv_path, "rb") as f:
+                start = time.perf_counter()
+                resp = client.post("/upload/logs?clear_existing=true",
+                                   files={"file": (os.path.basename(csv_path), f, "text/csv")})
+                elapsed = time.perf_counter() - start
+            if resp.status_code != 200:
+                raise RuntimeError(f"Upload failed with {resp.status_code}: {resp.text[:200]}")
+            count = resp.json()["count"]
+            results.update(_throughput("api.upload", count, elapsed))
+
+            top = client.get("/stats/top-ips", params={"limit": 1}).json()
+            endpoints = [
+                ("events", "/events", {"limit": 100}),
+                ("events_deep", "/events", {"offset": count // 2, "limit": 100}),
+                ("timeline", "/stats/timeline", {"granularity": "hour"}),
+                ("top_ips", "/stats/top-ips", {"limit": 10}),
+                ("storyline", f"/storyline/{top[0]['ip']}", {"limit": 1000}),
+            ]
+            for name, url, params in endpoints:
+                samples = _timed_requests(client.get, url, requests, params)
+                results.update(latency_ms(samples, f"api.{name}"))
+    finally:
+        config.MODEL_ARTIFACT_PATH = previous_path
+        app.dependency_overrides.pop(get_current_user, None)
+    return results
+
+
+def run_size(
+    size: int,
+    workdir: str,
+    train_limit: int = DEFAULT_TRAIN_LIMIT,
+    requests: int = DEFAULT_REQUESTS,
+    api: bool = True
+) -> Dict[str, float]:
+    results = {}
+    start = time.perf_counter()
+    paths = write_datasets(size, workdir)
+    results["generate.seconds"] = round(time.perf_counter() - start, 4)
+
+    loader_results, events = bench_loader(paths)
+    results.update(loader_results)
+    rules = RuleBasedDetector()
+    results.update(bench_rules(events, rules))
+    model_results, model = bench_model(events, train_limit)
+    results.update(model_results)
+    results.update(bench_pipeline(events, rules, model))
+    del events
+
+    if api:
+        model_path = os.path.join(workdir, f"model-{size}")
+        model.save_artifact(model_path)
+        results.update(bench_api(paths["csv"], model_path, requests))
+    for path in paths.values():
+        os.remove(path)
+    return results
+
+
+def run(
+    sizes=DEFAULT_SIZES,
+    workdir: Optional[str] = None,
+    train_limit: int = DEFAULT_TRAIN_LIMIT,
+    requests: int = DEFAULT_REQUESTS,
+    api: bool = True
+) -> dict:
+    own_workdir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="benchmarks-")
+    try:
+        results = {}
+        for size in sizes:
+            results[str(size)] = run_size(size, workdir, train_limit, requests, api)
+    finally:
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "train_limit": train_limit,
+            "requests": requests,
+        },
+        "results": results,
+    }
+
+
+# Metrics compared against a baseline: rates, latencies and training time.
+# A stage's ".seconds" is its rate restated, so it is not compared twice.
+METRIC_SUFFIXES = ("_per_second", "_ms", "_seconds")
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_second")
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+    """
+    Metrics at least `threshold` (a fraction) worse than the baseline, for
+    every size and metric present in both runs.
+    """
+    regressions = []
+    for size, metrics in current["results"].items():
+        base_metrics = baseline["results"].get(size, {})
+        for metric, value in metrics.items():
+            base = base_metrics.get(metric)
+            if not base or not metric.endswith(METRIC_SUFFIXES):
+                continue
+            change = (value - base) / base
+            worse = -change if higher_is_better(metric) else change
+            if worse > threshold:
+                regressions.append({
+                    "size": size, "metric": metric, "baseline": base,
+                    "current": value, "change": round(change, 3),
+                })
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Flag metrics this fraction worse than the baseline")
+    parser.add_argument("--save-baseline", help="Also write the results here as the new baseline")
+    parser.add_argument("--train-limit", type=int, default=DEFAULT_TRAIN_LIMIT)
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS)
+    parser.add_argument("--no-api", action="store_true", help="Skip the API endpoint benchmarks")
+    parser.add_argument("--workdir", help="Where datasets are written (default: a temporary directory)")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.workdir, args.train_limit, args.requests, api=not args.no_api)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        results["regressions"] = regressions
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    for size, metrics in results["results"].items():
+        print(f"\n{size} events")
+        for metric, value in metrics.items():
+            print(f"  {metric:<36}{value:>14}")
+    if args.baseline:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%} against {args.baseline}")
+        for r in regressions:
+            print(f"  [{r['size']}] {r['metric']}: {r['baseline']} -> {r['current']} ({r['change']:+.1%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
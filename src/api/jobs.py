@@ -0,0 +1,157 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
+from src.api.profiling import StageTimer
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested."""
+
+
+class UploadJob:
+    """
+    Progress of one upload, updated by the worker and read by /jobs.
+    """
+
+    def __init__(self, filename: str, bytes_total: int = 0):
+        self.id = str(uuid.uuid4())
+        self.filename = filename
+        self.status = "queued"  # queued, running, completed, failed, cancelled
+        self.rows_parsed = 0
+        self.rows_classified = 0
+        self.rows_committed = 0
+        self.bytes_total = bytes_total
+        self.bytes_read = 0
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.error_status = 500
+        self.future: Optional[Future] = None
+        # Per-stage wall time, rows and memory, filled in by the worker
+        self.timings = StageTimer()
+        self._cancel = threading.Event()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        """Called by the worker between steps."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def snapshot(self) -> dict:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        throughput = self.rows_committed / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if self.status == "running" and self.bytes_total and self.bytes_read:
+            remaining = max(self.bytes_total - self.bytes_read, 0)
+            eta = elapsed * remaining / self.bytes_read
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "rows_parsed": self.rows_parsed,
+            "rows_classified": self.rows_classified,
+            "rows_committed": self.rows_committed,
+            "bytes_read": self.bytes_read,
+            "bytes_total": self.bytes_total,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(throughput, 1),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "timings": self.timings.report(),
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+class JobManager:
+    """
+    Runs upload jobs on a small thread pool so ingest never blocks the
+    event loop, and keeps the most recent jobs for status queries. Only
+    finished jobs are dropped from the history; queued and running ones
+    stay until they finish, even past `history`.
+    """
+
+    def __init__(self, max_workers: int = 1, history: int = 100):
+        self.max_workers = max_workers
+        self.history = history
+        self.jobs: "OrderedDict[str, UploadJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def submit(self, job: UploadJob, run: Callable[[UploadJob], dict]) -> UploadJob:
+        with self._lock:
+            self.jobs[job.id] = job
+            self._trim()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="upload")
+        job.future = self._executor.submit(self._run, job, run)
+        return job
+
+    def _run(self, job: UploadJob, run: Callable[[UploadJob], dict]) -> dict:
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.check_cancelled()
+            job.result = run(job)
+            job.status = "completed"
+            return job.result
+        except JobCancelled:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = getattr(e, "detail", None) or str(e)
+            job.error_status = getattr(e, "status_code", 500)
+            raise
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._trim()
+
+    def _trim(self):
+        """Drop the oldest finished jobs beyond `history`. Caller holds _lock."""
+        excess = len(self.jobs) - self.history
+        if excess <= 0:
+            return
+        done = [job_id for job_id, job in self.jobs.items() if job.finished_at is not None]
+        for job_id in done[:excess]:
+            del self.jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[UploadJob]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self) -> List[UploadJob]:
+        with self._lock:
+            return list(reversed(self.jobs.values()))
+
+    def finished(self) -> List[UploadJob]:
+        """Jobs that are done, most recently finished first."""
+        with self._lock:
+            done = [job for job in self.jobs.values() if job.finished_at is not None]
+        return sorted(done, key=lambda job: job.finished_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[UploadJob]:
+        job = self.get(job_id)
+        if job is not None and job.status in ("queued", "running"):
+            job._cancel.set()
+            # Queued jobs never start; running ones stop at the next chunk
+            if job.future is not None and job.future.cancel():
+                job.status = "cancelled"
+                job.finished_at = time.time()
+        return job
+
+    def shutdown(self):
+        if self._executor is not None:
+            for job in self.list():
+                job._cancel.set()
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
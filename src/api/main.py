@@ -1,21 +1,40 @@
-from fastapi import FastAPI, HTTPException, Query, Depends, File, UploadFile
+from fastapi import FastAPI, HTTPException, Query, Depends, File, UploadFile, Response
 from typing import List, Optional
 from datetime import datetime, timedelta
 from pydantic import BaseModel
-import random
+import numpy as np
 
 from src.generation.synthetic import SyntheticLogGenerator
 from src.schema.events import UnifiedEvent
 from src.models.baseline import TFIDFClassifier
+from src.models.online import HashingClassifier
 from src.models.rules import RuleBasedDetector
 from src.models.success_classifier import SuccessClassifier
+from src.models.pipeline import ClassificationPipeline
+from src.models.artifacts import ModelArtifactError
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
 import time
+import logging
 import io
-import shutil
 import os
-from src.ingestion.loader import DataLoader
+import shutil
+import asyncio
+import tempfile
+from starlette.concurrency import run_in_threadpool
+from src.ingestion.loader import DataLoader, InvalidUploadError
+from src.storage.event_store import EventStore, to_epoch_us
+from src.storage.persistent import PersistentEventStore
+from src.storage.timeline import GRANULARITIES
+from src.api.jobs import JobManager, UploadJob, JobCancelled
+from src.api.pagination import encode_cursor, decode_cursor
+from src.api.serialization import dumps, ndjson_lines, NDJSON_MEDIA_TYPE
+from starlette.responses import StreamingResponse
+from src.api.metrics import MetricsRegistry, MetricsMiddleware
+from src.api.profiling import SamplingProfiler
+from src.logging_config import start_logging, stop_logging
+from src import config
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="URL Attack Classifier API")
 
@@ -31,22 +50,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        start_time = time.time()
-        print(f"--> Incoming {request.method} {request.url.path}")
-        response = await call_next(request)
-        process_time = (time.time() - start_time) * 1000
-        print(f"<-- Outgoing {request.method} {request.url.path} | Status: {response.status_code} | {process_time:.2f}ms")
-        return response
-
-app.add_middleware(RequestLoggingMiddleware)
+# Per-route request counts and latencies, served at /metrics
+METRICS = MetricsRegistry()
+app.add_middleware(MetricsMiddleware, registry=METRICS)
 
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from src.api.models import User, SessionLocal, init_db
+from src.api.user_cache import UserCache, CachedUser
 from src.api.auth_utils import verify_password, get_password_hash, create_access_token, SECRET_KEY, ALGORITHM
 from src.schema.auth import UserCreate, User as UserSchema
 from jose import JWTError, jwt
@@ -59,8 +73,17 @@ def get_db():
     finally:
         db.close()
 
+# Token -> user snapshot; any ORM write to a user row drops its entries
+USER_CACHE = UserCache(max_size=config.USER_CACHE_SIZE, ttl_seconds=config.USER_CACHE_TTL_SECONDS)
+USER_CACHE.watch(User)
+
 # Dependency for authentication
 def get_current_user(token: str = Depends(OAuth2PasswordBearer(tokenUrl="auth/login")), db: Session = Depends(get_db)):
+    # Sessions connect lazily, so a cache hit costs no database round trip
+    cached = USER_CACHE.get(token)
+    if cached is not None:
+        return cached
+
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
@@ -76,28 +99,135 @@ def get_current_user(token: str = Depends(OAuth2PasswordBearer(tokenUrl="auth/lo
     user = db.query(User).filter(User.username == username).first()
     if user is None:
         raise credentials_exception
-    return user
+    snapshot = CachedUser.from_user(user)
+    USER_CACHE.put(token, snapshot, token_expires_at=payload.get("exp"))
+    return snapshot
 
 @app.get("/")
 def read_root():
     return {"status": "ok", "message": "Sentinel AI API is running"}
 
-# In-memory "Database"
-DB_EVENTS: List[UnifiedEvent] = []
+# Columnar "Database", optionally persisted to disk
+RETENTION = dict(
+    max_events=config.RETENTION_MAX_EVENTS,
+    max_bytes=config.RETENTION_MAX_BYTES,
+    max_age_seconds=config.RETENTION_MAX_AGE_SECONDS,
+)
+if config.EVENT_STORE_MODE == "persistent":
+    EVENT_STORE = PersistentEventStore(config.EVENT_STORE_PATH, **RETENTION)
+else:
+    EVENT_STORE = EventStore(**RETENTION)
 MODEL_TFIDF = TFIDFClassifier()
-MODEL_RULES = RuleBasedDetector()
+MODEL_ONLINE = HashingClassifier()
+MODEL_RULES = RuleBasedDetector.from_file(config.RULES_PATH) if config.RULES_PATH else RuleBasedDetector()
 MODEL_SUCCESS = SuccessClassifier()
+PIPELINE = ClassificationPipeline(
+    MODEL_RULES, MODEL_ONLINE if config.MODEL_KIND == "online" else MODEL_TFIDF,
+    batch_size=config.INFERENCE_BATCH_SIZE,
+    workers=config.ANALYSIS_WORKERS,
+    shard_size=config.ANALYSIS_SHARD_SIZE,
+    cache_size=config.PREDICTION_CACHE_SIZE
+)
+UPLOAD_JOBS = JobManager(max_workers=config.UPLOAD_JOB_WORKERS)
+
+def load_model_artifact():
+    """Load the configured TF-IDF artifact; a bad artifact aborts startup."""
+    if PIPELINE.model is not MODEL_TFIDF:
+        logger.info("Using the %s classifier; MODEL_ARTIFACT_PATH applies to TF-IDF only.", config.MODEL_KIND)
+        return
+    if not config.MODEL_ARTIFACT_PATH:
+        logger.info("No MODEL_ARTIFACT_PATH configured; TF-IDF classifier is untrained.")
+        return
+    start = time.perf_counter()
+    try:
+        manifest = MODEL_TFIDF.load_artifact(config.MODEL_ARTIFACT_PATH)
+    except ModelArtifactError as e:
+        raise RuntimeError(f"Failed to load model artifact from {config.MODEL_ARTIFACT_PATH}: {e}") from e
+    # Workers hold the previous model
+    PIPELINE.restart()
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info("Loaded model artifact %r (%d classes) in %.1fms",
+                manifest['model_version'], len(manifest['classes']), elapsed)
 
 @app.on_event("startup")
 def startup_event():
     """Initialize DB and prepare system."""
-    global DB_EVENTS, MODEL_TFIDF
-    print("Setting up User DB...")
+    start_logging(config.LOG_LEVEL)
+    logger.info("Setting up User DB...")
     init_db()
+
+    load_model_artifact()
     
-    # Force clear any residual in-memory data
-    DB_EVENTS.clear() 
-    print("System ready (empty dataset confirmed).")
+    if isinstance(EVENT_STORE, PersistentEventStore):
+        # Recover everything committed before the last shutdown or crash
+        EVENT_STORE.load()
+        logger.info("System ready (%d stored events).", len(EVENT_STORE))
+    else:
+        # Force clear any residual in-memory data
+        EVENT_STORE.clear()
+        logger.info("System ready (empty dataset confirmed).")
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Stop upload jobs and classification worker processes."""
+    UPLOAD_JOBS.shutdown()
+    PIPELINE.shutdown()
+    stop_logging()
+
+# Events serialized per store lock acquisition when streaming NDJSON
+STREAM_PAGE_SIZE = 1000
+RESPONSE_FORMATS = ("json", "ndjson")
+
+def parse_cursor(cursor: Optional[str]):
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def check_format(format: str):
+    if format not in RESPONSE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(RESPONSE_FORMATS)}")
+
+def events_response(scan, cursor, offset: int, limit: int, format: str, paged: bool = True) -> Response:
+    """
+    Serve the rows of scan(cursor), a QueryScan, straight from the store
+    columns, skipping response_model validation.
+
+    "json" returns one array and, for a full page, an X-Next-Cursor header.
+    "ndjson" streams one event per line in STREAM_PAGE_SIZE pages read from
+    the same scan, so memory stays flat and the store lock is only held
+    per page.
+    """
+    if format == "ndjson":
+        return StreamingResponse(ndjson_lines(stream_pages(scan, cursor, offset, limit)),
+                                 media_type=NDJSON_MEDIA_TYPE)
+
+    headers = {}
+    with EVENT_STORE.lock:
+        rows = scan(cursor).next_page(offset, limit)
+        if paged and limit > 0 and len(rows) == limit:
+            headers["X-Next-Cursor"] = encode_cursor(*EVENT_STORE.cursor_of(int(rows[-1])))
+        body = dumps(EVENT_STORE.records(rows))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def stream_pages(scan, cursor, offset: int, limit: int):
+    with EVENT_STORE.lock:
+        pages = scan(cursor)
+    remaining = limit
+    while remaining > 0:
+        size = min(STREAM_PAGE_SIZE, remaining)
+        with EVENT_STORE.lock:
+            rows = pages.next_page(offset, size)
+            if len(rows) == 0:
+                return
+            records = EVENT_STORE.records(rows)
+        yield records
+        offset = 0
+        remaining -= len(rows)
+        if len(rows) < size:
+            return
 
 @app.get("/events", response_model=List[UnifiedEvent])
 def get_events(
@@ -105,80 +235,130 @@ def get_events(
     offset: int = 0,
     source_ip: Optional[str] = None,
     attack_type: Optional[str] = None,
-    is_successful: Optional[bool] = None
+    is_successful: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    format: str = "json"
 ):
     """
     Get paginated event logs with optional filters.
+    Pass a page's X-Next-Cursor header back as `cursor` for the next page;
+    format=ndjson streams the events one per line.
     """
-    filtered = DB_EVENTS
-    if source_ip:
-        filtered = [e for e in filtered if e.source_ip == source_ip]
-    if attack_type:
-        filtered = [e for e in filtered if e.attack_type == attack_type]
-    if is_successful is not None:
-        filtered = [e for e in filtered if e.is_successful == is_successful]
-        
-    # Sort by timestamp desc
-    filtered.sort(key=lambda x: x.timestamp, reverse=True)
-    return filtered[offset : offset + limit]
+    check_format(format)
+    # Indexed lookup, already ordered by timestamp desc
+    def scan(key):
+        return EVENT_STORE.scan(source_ip, attack_type, is_successful, cursor=key)
+    return events_response(scan, parse_cursor(cursor), offset, limit, format)
+
+TIMELINE_FORMATS = {
+    "minute": "%Y-%m-%d %H:%M",
+    "hour": "%Y-%m-%d %H:00",
+    "day": "%Y-%m-%d",
+}
 
 @app.get("/stats/timeline")
-def get_timeline():
+def get_timeline(
+    granularity: str = "hour",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
     """
     Aggregate attacks over time (buckets).
     """
-    # Simple bucketing by hour or day is nice.
-    # For now, let's just return raw counts per attack type to let frontend chart it
-    timeline = {}
-    for e in DB_EVENTS:
-        ts_str = e.timestamp.strftime("%Y-%m-%d %H:00")
-        if ts_str not in timeline:
-            timeline[ts_str] = {"Successful": 0, "Attempted": 0}
-        
-        if e.is_successful:
-            timeline[ts_str]["Successful"] += 1
-        else:
-            timeline[ts_str]["Attempted"] += 1
-            
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"Invalid granularity. Choose one of: {', '.join(GRANULARITIES)}.")
+
+    # Served from the rollup maintained at ingest time
+    with EVENT_STORE.lock:
+        buckets = EVENT_STORE.timeline.series(
+            granularity,
+            start_us=to_epoch_us(start) if start else None,
+            end_us=to_epoch_us(end) if end else None
+        )
+
     # Format for chart: array of objects
-    result = [{"time": k, "success": v["Successful"], "attempt": v["Attempted"]} for k, v in timeline.items()]
-    result.sort(key=lambda x: x["time"])
-    return result
+    fmt = TIMELINE_FORMATS[granularity]
+    return [
+        {
+            "time": np.datetime64(bucket, 'us').item().strftime(fmt),
+            "success": success,
+            "attempt": attempt
+        }
+        for bucket, success, attempt in buckets
+    ]
 
 @app.get("/stats/top-ips")
-def get_top_ips(limit: int = 5):
+def get_top_ips(
+    limit: int = 5,
+    attack_type: Optional[str] = None,
+    by_attack_type: bool = False
+):
     """
-    Return top attacker IPs.
+    Return top attacker IPs, overall or per attack type.
     """
-    counts = {}
-    for e in DB_EVENTS:
-        if e.attack_type == "Normal": continue
-        if e.source_ip not in counts:
-            counts[e.source_ip] = 0
-        counts[e.source_ip] += 1
-        
-    sorted_ips = sorted(counts.items(), key=lambda x: x[1], reverse=True)[:limit]
-    return [{"ip": ip, "count": count} for ip, count in sorted_ips]
+    # Read from the heavy-hitter trackers maintained at ingest time
+    with EVENT_STORE.lock:
+        if by_attack_type:
+            return {
+                name: [{"ip": ip, "count": count} for ip, count in tracker.top(limit)]
+                for name, tracker in EVENT_STORE.attackers.by_type.items()
+                if name != EVENT_STORE.attackers.ignored_type
+            }
+        top = EVENT_STORE.attackers.top(limit, attack_type)
+    return [{"ip": ip, "count": count} for ip, count in top]
+
+@app.get("/stats/memory")
+def get_memory_stats():
+    """
+    Return event store size, retention limits and eviction counters.
+    """
+    with EVENT_STORE.lock:
+        return EVENT_STORE.memory_stats()
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    Prometheus text exposition of request metrics and store gauges.
+    """
+    with EVENT_STORE.lock:
+        store = EVENT_STORE.memory_stats()
+    cache = PIPELINE.cache.stats()
+    gauges = {
+        "event_store_events": ("Events currently stored.", store["events"]),
+        "event_store_bytes": ("Estimated memory held by the event store.", store["bytes"]),
+        "event_store_evicted_events": ("Events evicted by retention limits.", store["evicted_events"]),
+        "prediction_cache_hits": ("Prediction cache hits.", cache["hits"]),
+        "prediction_cache_misses": ("Prediction cache misses.", cache["misses"]),
+        "upload_jobs_running": ("Upload jobs in progress.",
+                                sum(1 for job in UPLOAD_JOBS.list() if job.status == "running")),
+    }
+    return Response(content=METRICS.render(gauges), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/cache")
+def get_cache_stats():
+    """
+    Return prediction cache size and hit/miss counters.
+    """
+    return PIPELINE.cache.stats()
 
 @app.get("/explain/{event_id}")
 def get_explanation(event_id: str):
     """
     Get explainability details for a specific event.
     """
-    event = next((e for e in DB_EVENTS if e.event_id == event_id), None)
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
+    with EVENT_STORE.lock:
+        row = EVENT_STORE.find_row(event_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Event not found")
+        event = EVENT_STORE.get(row)
         
-    # Re-run rule detection for explanation
-    rule_hits = MODEL_RULES.analyze(event)
-    
-    # Fake confidence for demo if not computed
-    confidence = event.confidence if event.confidence > 0 else random.uniform(0.7, 0.99)
+        # Rule matches were recorded at upload time
+        rule_hits = EVENT_STORE.get_rule_matches(row)
     
     return {
         "event_id": event_id,
         "attack_type": event.attack_type,
-        "confidence": confidence,
+        "confidence": event.confidence,
         "rule_hits": rule_hits, # Dict {type: [rules]}
         "payload_snippet": (event.payload or "")[:50],
         "factors": [
@@ -188,13 +368,29 @@ def get_explanation(event_id: str):
     }
 
 @app.get("/storyline/{ip}")
-def get_storyline(ip: str):
+def get_storyline(
+    ip: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    attack_type: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    format: str = "json"
+):
     """
-    Get full chronological history for an IP.
+    Get chronological history for an IP: all of it by default, or pages of
+    `limit` events continued with the X-Next-Cursor header as `cursor`.
+    Optionally restricted to a time window and/or one attack type.
     """
-    events = [e for e in DB_EVENTS if e.source_ip == ip]
-    events.sort(key=lambda x: x.timestamp)
-    return events
+    check_format(format)
+    start_us = to_epoch_us(start) if start is not None else None
+    end_us = to_epoch_us(end) if end is not None else None
+    # Served from the IP's time-ordered posting list, never a full scan
+    def scan(key):
+        return EVENT_STORE.scan(source_ip=ip, attack_type=attack_type, cursor=key, descending=False,
+                                start_us=start_us, end_us=end_us)
+    page_size = limit if limit is not None else len(EVENT_STORE)
+    return events_response(scan, parse_cursor(cursor), 0, page_size, format, paged=limit is not None)
 
 # --- Auth Endpoints ---
 
@@ -227,90 +423,214 @@ def read_users_me(current_user: User = Depends(get_current_user)):
 @app.delete("/events")
 def clear_events(current_user: User = Depends(get_current_user)):
     """Clear all events from the in-memory database."""
-    global DB_EVENTS
-    DB_EVENTS.clear()
-    print(f"User {current_user.username} cleared all events.")
+    EVENT_STORE.clear()
+    logger.info("User %s cleared all events.", current_user.username)
     return {"status": "success", "message": "All events have been cleared"}
 
+def ingest_upload(job: UploadJob, source, file_extension: str, clear_existing: bool, username: str,
+                  learn: bool = False, profile: bool = False) -> dict:
+    """
+    Run ingest_stages, optionally under the sampling profiler, and attach
+    the per-stage timings (and profile) to the result.
+    """
+    profiler = SamplingProfiler().start() if profile else None
+    try:
+        result = ingest_stages(job, source, file_extension, clear_existing, username, learn)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+    result["timings"] = job.timings.report()
+    if profiler is not None:
+        result["profile"] = profiler.report()
+    logger.info("Upload finished", extra={
+        "job_id": job.id, "upload": job.filename, "count": result["count"],
+        "seconds": result["timings"]["total_seconds"]})
+    return result
+
+def ingest_stages(job: UploadJob, source, file_extension: str, clear_existing: bool, username: str,
+                  learn: bool = False) -> dict:
+    """
+    Parse, classify and commit an uploaded file chunk by chunk, reporting
+    progress and per-stage timings on `job`. Runs on a JobManager worker
+    thread.
+
+    With `learn`, the attack_type labels in the file are treated as ground
+    truth and fed to the online model before each chunk is classified.
+    """
+    timings = job.timings
+    if clear_existing:
+        logger.info("Clearing existing data before upload for %s", username)
+        with timings.stage("clear"):
+            EVENT_STORE.clear()
+
+    logger.debug("Processing upload", extra={"job_id": job.id, "upload": job.filename})
+    # Stream straight from the file object, one chunk at a time
+    parse_stats = {"malformed": 0}
+    if file_extension == ".csv":
+        chunks = DataLoader.iter_csv(source, chunksize=config.UPLOAD_CHUNK_SIZE)
+    elif file_extension == ".json":
+        chunks = DataLoader.iter_json_array(source, chunksize=config.UPLOAD_CHUNK_SIZE, stats=parse_stats)
+    else:
+        chunks = DataLoader.iter_jsonl(source, chunksize=config.UPLOAD_CHUNK_SIZE, stats=parse_stats)
+
+    chunk_stats = []
+    total = 0
+    learned = 0
+    try:
+        for i, new_events in enumerate(timings.timed(chunks, "parse")):
+            job.bytes_read = source.tell()
+            job.rows_parsed += len(new_events)
+            job.check_cancelled()
+            if not new_events:
+                continue
+            if learn:
+                with timings.stage("learn", len(new_events)):
+                    learned += PIPELINE.model.partial_fit(new_events)
+                    # Worker processes hold a copy of the previous weights
+                    PIPELINE.restart()
+            # Rules for every event, batched ML inference for rule misses
+            classify_stats = {}
+            with timings.stage("classify", len(new_events)):
+                rule_matches = PIPELINE.classify(new_events, classify_stats)
+            for part in ("rules", "model"):
+                if f"{part}_seconds" in classify_stats:
+                    timings.add(f"classify.{part}", classify_stats[f"{part}_seconds"], classify_stats[f"{part}_rows"])
+            # Attempt vs success from the predicted attack type
+            with timings.stage("success", len(new_events)):
+                successes = MODEL_SUCCESS.batch_predict(new_events, [e.attack_type for e in new_events])
+                for event, success in zip(new_events, successes):
+                    event.is_successful = success
+            job.rows_classified += len(new_events)
+            job.check_cancelled()
+            # Commit the chunk before reading the next one
+            with timings.stage("commit", len(new_events)):
+                EVENT_STORE.append(new_events, rule_matches)
+            job.rows_committed += len(new_events)
+            total += len(new_events)
+            chunk_stats.append({
+                "chunk": i,
+                "count": len(new_events),
+                "attacks": sum(1 for e in new_events if e.attack_type != "Normal")
+            })
+            logger.debug("Committed chunk", extra={
+                "job_id": job.id, "chunk": i, "count": len(new_events), "stored": len(EVENT_STORE)})
+    except (HTTPException, JobCancelled):
+        raise
+    except InvalidUploadError as e:
+        logger.warning("Rejected upload: %s", e, extra={"job_id": job.id, "upload": job.filename})
+        raise HTTPException(status_code=400, detail=f"Invalid file: {e}")
+    except Exception as e:
+        logger.exception("Upload failed", extra={"job_id": job.id, "upload": job.filename})
+        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+
+    if total == 0:
+        raise HTTPException(status_code=400, detail="No valid events found in file.")
+
+    return {
+        "status": "success",
+        "message": f"Successfully uploaded {total} events",
+        "count": total,
+        "malformed": parse_stats["malformed"],
+        "learned": learned,
+        "chunks": chunk_stats
+    }
+
 @app.post("/upload/logs")
 async def upload_logs(
     file: UploadFile = File(...), 
     clear_existing: bool = Query(False),
+    background: bool = Query(False),
+    learn: bool = Query(False),
+    profile: bool = Query(False),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Upload a CSV or JSON log file for analysis.
+    Upload a CSV, JSON or JSON Lines (.jsonl/.ndjson) log file for analysis.
+
+    Ingest runs on a worker thread so the event loop keeps serving other
+    requests. With background=true the call returns a job id right away;
+    poll /jobs/{job_id} for progress. Per-stage timings are part of the
+    result; profile=true also samples the ingest thread's stacks.
     """
-    global DB_EVENTS
-    
-    if clear_existing:
-        print(f"DEBUG: Clearing existing data before upload for {current_user.username}")
-        DB_EVENTS.clear()
-    
     file_extension = os.path.splitext(file.filename)[1].lower()
-    if file_extension not in [".csv", ".json"]:
-        raise HTTPException(status_code=400, detail="Invalid file format. Please upload CSV or JSON.")
+    if file_extension not in [".csv", ".json", ".jsonl", ".ndjson"]:
+        raise HTTPException(status_code=400, detail="Invalid file format. Please upload CSV, JSON or JSON Lines.")
+    if learn and not hasattr(PIPELINE.model, "partial_fit"):
+        raise HTTPException(status_code=400, detail="Learning from uploads requires MODEL_KIND=online.")
 
-    # Save temp file
-    temp_path = f"temp_{file.filename}"
-    with open(temp_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    source = file.file
+    copy_seconds = None
+    if background:
+        # The request's upload file is closed once we respond, so hand the
+        # job its own anonymous copy
+        copy_start = time.perf_counter()
+        source = tempfile.TemporaryFile()
+        await run_in_threadpool(shutil.copyfileobj, file.file, source)
+        source.seek(0)
+        copy_seconds = time.perf_counter() - copy_start
+
+    source.seek(0, os.SEEK_END)
+    job = UploadJob(file.filename, bytes_total=source.tell())
+    source.seek(0)
+    if copy_seconds is not None:
+        job.timings.add("copy", copy_seconds)
+
+    def run(job: UploadJob) -> dict:
+        try:
+            return ingest_upload(job, source, file_extension, clear_existing, current_user.username,
+                                 learn, profile)
+        finally:
+            if background:
+                source.close()
+
+    UPLOAD_JOBS.submit(job, run)
+    if background:
+        return {"status": "accepted", "job_id": job.id, "status_url": f"/jobs/{job.id}"}
 
     try:
-        print(f"DEBUG: Processing upload for {file.filename}")
-        if file_extension == ".csv":
-            new_events = DataLoader.load_csv(temp_path)
-        else:
-            new_events = DataLoader.load_json(temp_path)
-
-        print(f"DEBUG: Loaded {len(new_events)} events")
-        if not new_events:
-            raise HTTPException(status_code=400, detail="No valid events found in file.")
-
-        # Classify events if they don't have predictions
-        for i, event in enumerate(new_events):
-            # Simple heuristic: if confidence is 0.0, we probably need to predict
-            if event.confidence <= 0.1:
-                # 1. Rules
-                matches = MODEL_RULES.analyze(event)
-                if matches:
-                    # Pick the first matching attack type from rules
-                    event.attack_type = list(matches.keys())[0]
-                    # Flatten all rule descriptions
-                    all_hits = []
-                    for rule_list in matches.values():
-                        all_hits.extend(rule_list)
-                    event.rule_hits = all_hits
-                    event.confidence = 1.0 # Rule hits are 100% confident for this demo
-                else:
-                    # 2. ML Probability if no rules hit
-                    probs = MODEL_TFIDF.predict_proba([event.url])[0]
-                    event.confidence = float(max(probs))
-                    
-                    # 3. Label based on ML (assuming class 1 is Attack if 2 classes, or highest prob)
-                    if len(probs) > 1 and probs[1] > 0.5:
-                         event.attack_type = "Attack"
-                    else:
-                         event.attack_type = "Normal"
-        
-        print(f"DEBUG: Classified all events")
-        # Add to global store
-        DB_EVENTS.extend(new_events)
-        # Sort by timestamp to keep things clean
-        DB_EVENTS.sort(key=lambda x: x.timestamp, reverse=True)
-        print(f"DEBUG: Updated DB_EVENTS, total now: {len(DB_EVENTS)}")
-        
-        return {
-            "status": "success",
-            "message": f"Successfully uploaded {len(new_events)} events",
-            "count": len(new_events)
-        }
-    except Exception as e:
-        if isinstance(e, HTTPException):
-            raise e
-        print("CRITICAL ERROR IN UPLOAD:")
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        return await asyncio.wrap_future(job.future)
+    except JobCancelled:
+        raise HTTPException(status_code=409, detail="Upload was cancelled.")
+
+@app.get("/uploads/history")
+def get_upload_history(limit: int = 20):
+    """
+    Recently finished uploads with their per-stage timings, newest first.
+    """
+    history = []
+    for job in UPLOAD_JOBS.finished()[:max(limit, 0)]:
+        snapshot = job.snapshot()
+        history.append({
+            "job_id": job.id,
+            "filename": job.filename,
+            "status": job.status,
+            "finished_at": datetime.fromtimestamp(job.finished_at).isoformat(),
+            "rows": job.rows_committed,
+            "bytes": job.bytes_total,
+            "elapsed_seconds": snapshot["elapsed_seconds"],
+            "rows_per_second": snapshot["rows_per_second"],
+            "timings": snapshot["timings"],
+        })
+    return history
+
+@app.get("/jobs")
+def list_jobs():
+    """Recent upload jobs, newest first."""
+    return [job.snapshot() for job in UPLOAD_JOBS.list()]
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Progress of an upload job: rows parsed/classified/committed, throughput and ETA."""
+    job = UPLOAD_JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.snapshot()
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """Stop an upload job after its current chunk; committed chunks are kept."""
+    job = UPLOAD_JOBS.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    logger.info("User %s cancelled job %s.", current_user.username, job_id)
+    return job.snapshot()
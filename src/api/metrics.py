@@ -0,0 +1,167 @@
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Request latency bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Quantiles are estimated by linear interpolation
+    inside the bucket that holds them, as Prometheus' histogram_quantile does.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if n and cumulative + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    # Past the last bound there is nothing to interpolate to
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / n
+            cumulative += n
+        return self.buckets[-1]
+
+
+def _labels(**labels) -> str:
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class MetricsRegistry:
+    """
+    In-process HTTP metrics: request counts per route and status, latency
+    histograms per route and an in-flight gauge. Routes are labelled by
+    their path template (/explain/{event_id}) to keep cardinality bounded.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.in_flight = 0
+        self.started_at = time.time()
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, method: str, route: str, status: int, seconds: float):
+        with self._lock:
+            self.in_flight -= 1
+            key = (method, route, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.latency.get((method, route))
+            if histogram is None:
+                histogram = self.latency[(method, route)] = Histogram()
+            histogram.observe(seconds)
+
+    def render(self, gauges: Optional[Dict[str, Tuple[str, float]]] = None) -> str:
+        """
+        Prometheus text exposition. `gauges` adds name -> (help, value)
+        application gauges sampled by the caller.
+        """
+        lines: List[str] = []
+        with self._lock:
+            lines += [
+                "# HELP http_requests_total HTTP requests by route and status.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status), n in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {n}")
+
+            lines += [
+                "# HELP http_request_duration_seconds HTTP request latency by route.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), h in sorted(self.latency.items()):
+                cumulative = 0
+                for bound, n in zip(h.buckets + (float("inf"),), h.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(
+                        f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le=le)} {cumulative}")
+                lines.append(f"http_request_duration_seconds_sum{_labels(method=method, route=route)} {h.sum:.6f}")
+                lines.append(f"http_request_duration_seconds_count{_labels(method=method, route=route)} {h.count}")
+
+            lines += [
+                "# HELP http_request_duration_quantile_seconds Estimated latency quantiles by route.",
+                "# TYPE http_request_duration_quantile_seconds gauge",
+            ]
+            for (method, route), h in sorted(self.latency.items()):
+                for q in QUANTILES:
+                    lines.append(
+                        f"http_request_duration_quantile_seconds{_labels(method=method, route=route, quantile=q)} "
+                        f"{h.quantile(q):.6f}")
+
+            lines += [
+                "# HELP http_requests_in_flight Requests currently being handled.",
+                "# TYPE http_requests_in_flight gauge",
+                f"http_requests_in_flight {self.in_flight}",
+            ]
+
+        for name, (help_text, value) in (gauges or {}).items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording every HTTP request in a MetricsRegistry
+    and logging it; nothing here blocks the event loop.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.registry.request_started()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            # The router records the matched route in the scope
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.registry.request_finished(scope["method"], route, status, elapsed)
+            logger.info("request", extra={
+                "method": scope["method"], "path": scope["path"], "route": route,
+                "status": status, "duration_ms": round(elapsed * 1000, 2),
+            })
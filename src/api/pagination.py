@@ -0,0 +1,18 @@
+import base64
+from typing import Tuple
+
+
+def encode_cursor(ts_us: int, row: int) -> str:
+    """Opaque token for the (timestamp, row id) key of the last row of a page."""
+    raw = f"{ts_us}:{row}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[int, int]:
+    """Inverse of encode_cursor; raises ValueError for a malformed token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode('utf-8')
+        ts, row = raw.split(":", 1)
+        return int(ts), int(row)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
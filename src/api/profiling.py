@@ -0,0 +1,209 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process right now, in MiB (Linux only)."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * _PAGE_SIZE / (1024 * 1024)
+
+
+class RssSampler:
+    """
+    Peak RSS while a stage runs. getrusage's ru_maxrss is a lifetime
+    high-water mark, so it can't tell stages apart; instead one daemon
+    thread reads the current RSS every `interval` seconds while any stage
+    is open and raises each open stage's peak.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        # id(sample) -> [RSS at open, highest RSS seen]
+        self._open: Dict[int, List[float]] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def open(self) -> Optional[List[float]]:
+        rss = current_rss_mb()
+        if rss is None:
+            return None
+        sample = [rss, rss]
+        with self._cond:
+            self._open[id(sample)] = sample
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return sample
+
+    def close(self, sample: Optional[List[float]]) -> Optional[Tuple[float, float]]:
+        """(peak RSS, growth over the RSS at open) for a sample from open()."""
+        if sample is None:
+            return None
+        rss = current_rss_mb() or sample[1]
+        with self._cond:
+            self._open.pop(id(sample), None)
+            peak = max(sample[1], rss)
+        return peak, peak - sample[0]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._open:
+                    self._cond.wait()
+            rss = current_rss_mb()
+            with self._cond:
+                for sample in self._open.values():
+                    sample[1] = max(sample[1], rss)
+            time.sleep(self.interval)
+
+
+RSS_SAMPLER = RssSampler()
+
+
+class StageTimer:
+    """
+    Wall time, rows and memory per named stage of a job. A stage may run
+    many times (once per chunk); time and rows accumulate, and memory is
+    the highest RSS seen while any run of the stage was open, plus the
+    largest growth within one run over the RSS it started at.
+    """
+
+    def __init__(self):
+        self.stages: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, rows: int = 0):
+        sample = RSS_SAMPLER.open()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, rows, RSS_SAMPLER.close(sample))
+
+    def add(self, name: str, seconds: float, rows: int = 0, memory: Optional[Tuple[float, float]] = None):
+        """Charge a run to `name`; `memory` is (peak RSS, growth) from RssSampler.close."""
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = {
+                    "seconds": 0.0, "rows": 0, "calls": 0, "peak_rss_mb": None, "rss_growth_mb": None}
+            stage["seconds"] += seconds
+            stage["rows"] += rows
+            stage["calls"] += 1
+            if memory is not None:
+                peak, growth = memory
+                stage["peak_rss_mb"] = max(stage["peak_rss_mb"] or 0.0, peak)
+                stage["rss_growth_mb"] = max(stage["rss_growth_mb"] or 0.0, growth)
+
+    def timed(self, items: Iterable, name: str) -> Iterator:
+        """Yield from `items`, charging the time spent producing each one to `name`."""
+        iterator = iter(items)
+        while True:
+            sample = RSS_SAMPLER.open()
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                RSS_SAMPLER.close(sample)
+                return
+            except BaseException:
+                RSS_SAMPLER.close(sample)
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+            self.add(name, elapsed, len(item) if hasattr(item, "__len__") else 0, RSS_SAMPLER.close(sample))
+            yield item
+
+    def report(self) -> dict:
+        with self._lock:
+            stages = {name: dict(stage) for name, stage in self.stages.items()}
+        # Sub-stages ("classify.rules") are already inside their parent
+        total = sum(s["seconds"] for name, s in stages.items() if "." not in name)
+        for stage in stages.values():
+            stage["rows_per_second"] = round(stage["rows"] / stage["seconds"], 1) if stage["rows"] and stage["seconds"] else None
+            stage["share"] = round(stage["seconds"] / total, 3) if total else 0.0
+            stage["seconds"] = round(stage["seconds"], 4)
+            for key in ("peak_rss_mb", "rss_growth_mb"):
+                if stage[key] is not None:
+                    stage[key] = round(stage[key], 1)
+        peaks = [s["peak_rss_mb"] for s in stages.values() if s["peak_rss_mb"] is not None]
+        return {"total_seconds": round(total, 4), "peak_rss_mb": max(peaks, default=None), "stages": stages}
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for one thread: a daemon thread snapshots the
+    target's stack every `interval` seconds via sys._current_frames. Cheap
+    enough to switch on for a single production request.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.samples = 0
+        self.self_counts: Counter = Counter()
+        self.total_counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            seen = set()
+            leaf = True
+            while frame is not None:
+                code = frame.f_code
+                key = f"{code.co_filename}:{code.co_firstlineno} {code.co_name}"
+                if leaf:
+                    self.self_counts[key] += 1
+                    leaf = False
+                if key not in seen:
+                    # Recursive functions count once per sample
+                    self.total_counts[key] += 1
+                    seen.add(key)
+                frame = frame.f_back
+
+    def report(self, top: int = 20) -> dict:
+        def ranked(counts: Counter) -> List[dict]:
+            return [
+                {"frame": key, "samples": n, "share": round(n / self.samples, 3)}
+                for key, n in counts.most_common(top)
+            ]
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "self": ranked(self.self_counts),
+            "cumulative": ranked(self.total_counts),
+        }
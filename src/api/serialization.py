@@ -0,0 +1,19 @@
+import json
+from typing import Iterable, Iterator, List
+
+try:
+    import orjson
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:  # optional faster encoder
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode('utf-8')
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def ndjson_lines(pages: Iterable[List[dict]]) -> Iterator[bytes]:
+    """One JSON document per line, one chunk of bytes per page of records."""
+    for records in pages:
+        yield b"".join(dumps(record) + b"\n" for record in records)
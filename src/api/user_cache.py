@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from sqlalchemy import event
+
+
+class CachedUser:
+    """
+    Detached snapshot of a User row: safe to share across requests and
+    threads, unlike an ORM instance bound to a closed session.
+    """
+
+    __slots__ = ("id", "username", "role")
+
+    def __init__(self, id: int, username: str, role: str):
+        self.id = id
+        self.username = username
+        self.role = role
+
+    @classmethod
+    def from_user(cls, user) -> "CachedUser":
+        return cls(user.id, user.username, user.role)
+
+
+class UserCache:
+    """
+    Bounded LRU of bearer token -> CachedUser. Entries expire after
+    `ttl_seconds` or when the token itself expires, whichever is first, and
+    are dropped as soon as the user's row changes (see `watch`).
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 60.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # token -> (user, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[CachedUser]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token: str, user: CachedUser, token_expires_at: Optional[float] = None):
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        with self._lock:
+            self._entries[token] = (user, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: Optional[int] = None, username: Optional[str] = None):
+        """Drop every token that resolved to this user."""
+        with self._lock:
+            stale = [
+                token for token, (user, _) in self._entries.items()
+                if user.id == user_id or user.username == username
+            ]
+            for token in stale:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def watch(self, model):
+        """Invalidate on every ORM insert, update or delete of `model` rows."""
+        def on_change(mapper, connection, target):
+            self.invalidate_user(target.id, target.username)
+
+        for name in ("after_insert", "after_update", "after_delete"):
+            event.listen(model, name, on_change)
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,55 @@
+import os
+
+# Runtime settings, overridable through environment variables.
+
+# Optional JSON rule set for RuleBasedDetector (defaults to the built-in RULES)
+RULES_PATH = os.getenv("RULES_PATH")
+
+# Rule-miss events scored per TFIDFClassifier.predict_proba call during upload
+INFERENCE_BATCH_SIZE = int(os.getenv("INFERENCE_BATCH_SIZE", "1024"))
+
+# Rows parsed, classified and committed per step of a streaming upload
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", "50000"))
+
+# Worker processes for upload classification (0 or 1 classifies in-process)
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "0"))
+# Smallest shard handed to a worker (chunks are split one shard per worker);
+# smaller chunks stay in-process
+ANALYSIS_SHARD_SIZE = int(os.getenv("ANALYSIS_SHARD_SIZE", "2000"))
+
+# Upload classifications cached per "method url payload" text (0 disables)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "100000"))
+
+# Upload jobs processed concurrently (each one streams chunk by chunk)
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", "1"))
+
+# Model artifact directory loaded at startup (see src/models/artifacts.py);
+# when unset the TF-IDF classifier starts untrained
+MODEL_ARTIFACT_PATH = os.getenv("MODEL_ARTIFACT_PATH")
+
+# Classifier behind the upload pipeline: "tfidf" (TFIDFClassifier) or
+# "online" (HashingClassifier, which can learn from labeled uploads)
+MODEL_KIND = os.getenv("MODEL_KIND", "tfidf")
+
+# Event storage: "memory" (lost on restart) or "persistent" (append-only
+# segment files under EVENT_STORE_PATH, reloaded at startup)
+EVENT_STORE_MODE = os.getenv("EVENT_STORE_MODE", "memory")
+EVENT_STORE_PATH = os.getenv("EVENT_STORE_PATH", "data/events")
+
+# Retention limits for the event store (0 = unlimited); the oldest events
+# are evicted first. Bytes are the store's own estimate, age is measured
+# back from the newest stored event.
+RETENTION_MAX_EVENTS = int(os.getenv("RETENTION_MAX_EVENTS", "0"))
+RETENTION_MAX_BYTES = int(os.getenv("RETENTION_MAX_BYTES", "0"))
+RETENTION_MAX_AGE_SECONDS = int(os.getenv("RETENTION_MAX_AGE_SECONDS", "0"))
+
+# User database; SQLite files are opened in WAL mode (see src/api/models.py)
+USERS_DATABASE_URL = os.getenv("USERS_DATABASE_URL", "sqlite:///./users.db")
+USERS_DB_POOL_SIZE = int(os.getenv("USERS_DB_POOL_SIZE", "5"))
+
+# Authenticated users cached per bearer token, so most requests skip the DB
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
+# Level for the application's structured (JSON lines) logs
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -1,8 +1,102 @@
 import pandas as pd
+import numpy as np
 import json
-from typing import List
+import ast
+import uuid
+import codecs
+import logging
+from typing import List, Dict, Optional, Iterator, Union, IO
 from src.schema.events import UnifiedEvent
 
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # optional faster decoder
+    _loads = json.loads
+
+# Bytes read per step when streaming a JSON array
+JSON_READ_SIZE = 1 << 16
+# Give up on an array element that is still incomplete after this many bytes
+JSON_MAX_OBJECT_BYTES = 1 << 20
+# Columns a CSV must have; the rest have defaults
+REQUIRED_CSV_COLUMNS = ('timestamp', 'source_ip', 'url')
+
+
+class InvalidUploadError(ValueError):
+    """The uploaded file can't be read as log events (a client error)."""
+
+
+def _text_column(df: pd.DataFrame, column: str, default: Optional[str] = None) -> list:
+    """String values, with missing or empty cells replaced by `default`."""
+    if column not in df:
+        return [default] * len(df)
+    values = df[column].astype(str).to_numpy(dtype=object, copy=True)
+    missing = df[column].isna().to_numpy() | (values == '')
+    values[missing] = default
+    return values.tolist()
+
+
+def _int_column(df: pd.DataFrame, column: str, default: int) -> list:
+    if column not in df:
+        return [default] * len(df)
+    values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float, copy=True)
+    values[~np.isfinite(values)] = default
+    return np.trunc(values).astype(np.int64).tolist()
+
+
+def _float_column(df: pd.DataFrame, column: str, default: float) -> list:
+    if column not in df:
+        return [default] * len(df)
+    values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float, copy=True)
+    values[np.isnan(values)] = default
+    return values.tolist()
+
+
+def _bool_column(df: pd.DataFrame, column: str) -> list:
+    """Booleans as pydantic would read them; missing cells are False."""
+    if column not in df:
+        return [False] * len(df)
+    col = df[column]
+    if col.dtype == bool:
+        return col.tolist()
+    text = col.astype(str).str.strip().str.lower()
+    truthy = text.isin(['true', '1', '1.0', 'yes', 'y', 't', 'on'])
+    return (truthy & col.notna()).tolist()
+
+
+def _literal_column(df: pd.DataFrame, column: str, kind: type) -> list:
+    """
+    Parse Python-literal cells (e.g. "{'Host': 'example.com'}") into `kind`.
+    Empty or unparsable cells become an empty `kind`. Distinct strings are
+    parsed once, since these columns are highly repetitive.
+    """
+    if column not in df:
+        return [kind() for _ in range(len(df))]
+    parsed = {}
+    result = []
+    for cell in df[column].tolist():
+        if not isinstance(cell, str) or not cell:
+            result.append(kind())
+            continue
+        if cell not in parsed:
+            try:
+                value = ast.literal_eval(cell)
+            except Exception:
+                value = None
+            if not isinstance(value, kind):
+                value = kind()
+            elif kind is dict:
+                value = {str(k): str(v) for k, v in value.items()}
+            else:
+                value = [str(v) for v in value]
+            parsed[cell] = value
+        # Copy so events never share a mutable container
+        result.append(kind(parsed[cell]))
+    return result
+
+
 class DataLoader:
     """
     Ingests data from CSV/JSON into UnifiedEvent objects.
@@ -12,86 +106,206 @@ class DataLoader:
     def load_csv(path: str) -> List[UnifiedEvent]:
         try:
             df = pd.read_csv(path)
-            # Ensure timestamps are parsed
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-            events = []
-            import ast
-            import uuid
-            for _, row in df.iterrows():
-                # Filter out NaN/None
-                data = row.where(pd.notnull(row), None).to_dict()
-                
-                # Ensure required fields have defaults if missing in CSV
-                if not data.get('event_id'):
-                    data['event_id'] = str(uuid.uuid4())
-                if not data.get('method'):
-                    data['method'] = 'GET'
-                if not data.get('user_agent'):
-                    data['user_agent'] = 'Unknown'
-                if 'response_size' not in data:
-                    data['response_size'] = 0
-                else:
-                    try:
-                        data['response_size'] = int(float(data['response_size']))
-                    except:
-                        data['response_size'] = 0
-
-                if 'status_code' not in data:
-                    data['status_code'] = 200
-                else:
-                    try:
-                        data['status_code'] = int(float(data['status_code']))
-                    except:
-                        data['status_code'] = 200
-
-                # Ensure headers is a dict
-                if isinstance(data.get('headers'), str):
-                    try:
-                        data['headers'] = ast.literal_eval(data['headers'])
-                    except:
-                        data['headers'] = {}
-                
-                if not isinstance(data.get('headers'), dict):
-                    data['headers'] = {}
-                
-                # Ensure rule_hits is a list
-                if isinstance(data.get('rule_hits'), str):
-                    try:
-                        data['rule_hits'] = ast.literal_eval(data['rule_hits'])
-                    except:
-                        data['rule_hits'] = []
-                
-                if not isinstance(data.get('rule_hits'), list):
-                    data['rule_hits'] = []
-
-                # Ensure confidence is float
-                try:
-                    data['confidence'] = float(data.get('confidence', 0.0))
-                except:
-                    data['confidence'] = 0.0
-
-                # Ensure labels have defaults if missing (will be filled by ML in main.py)
-                if not data.get('attack_type'):
-                    data['attack_type'] = "Analyzing..."
-                
-                if data.get('is_successful') is None:
-                    data['is_successful'] = False
-
-                events.append(UnifiedEvent(**data))
-            return events
+            return DataLoader.frame_to_events(df)
         except Exception as e:
-            print(f"Error loading CSV {path}: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error loading CSV %s: %s", path, e)
             return []
 
     @staticmethod
-    def load_json(path: str) -> List[UnifiedEvent]:
+    def iter_csv(source: Union[str, IO], chunksize: int = 50000) -> Iterator[List[UnifiedEvent]]:
+        """
+        Yield events `chunksize` rows at a time from a path or file object,
+        so only one chunk is held in memory. Unreadable input raises
+        InvalidUploadError; other errors propagate as they are.
+        """
         try:
-            with open(path, 'r') as f:
-                data = json.load(f)
+            for df in pd.read_csv(source, chunksize=chunksize):
+                try:
+                    events = DataLoader.frame_to_events(df)
+                except (KeyError, ValueError) as e:
+                    raise InvalidUploadError(str(e)) from e
+                yield events
+        except pd.errors.EmptyDataError as e:
+            raise InvalidUploadError("The CSV file is empty.") from e
+        except (pd.errors.ParserError, UnicodeDecodeError) as e:
+            raise InvalidUploadError(f"Malformed CSV: {e}") from e
+
+    @staticmethod
+    def frame_to_events(df: pd.DataFrame) -> List[UnifiedEvent]:
+        """
+        Convert a log DataFrame to UnifiedEvents column by column.
+
+        Defaults, numeric coercion and id filling are vectorized; only
+        non-empty header/rule_hits cells are parsed. Every column is
+        coerced to the schema's types here, so events are built with
+        model_construct instead of per-row validation.
+        """
+        missing = [column for column in REQUIRED_CSV_COLUMNS if column not in df.columns]
+        if missing:
+            raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+        n = len(df)
+        if n == 0:
+            return []
+
+        # Ensure timestamps are parsed
+        timestamps = pd.to_datetime(df['timestamp'])
+        for column, values in (('timestamp', timestamps), ('source_ip', df['source_ip']), ('url', df['url'])):
+            if values.isna().any():
+                raise ValueError(f"Column '{column}' has empty values")
+
+        event_ids = _text_column(df, 'event_id', default='')
+        for i, event_id in enumerate(event_ids):
+            if not event_id:
+                event_ids[i] = str(uuid.uuid4())
+
+        columns = {
+            'event_id': event_ids,
+            'timestamp': timestamps.dt.to_pydatetime().tolist(),
+            'source_ip': _text_column(df, 'source_ip'),
+            'method': _text_column(df, 'method', default='GET'),
+            'url': _text_column(df, 'url'),
+            'user_agent': _text_column(df, 'user_agent', default='Unknown'),
+            'headers': _literal_column(df, 'headers', dict),
+            'payload': _text_column(df, 'payload'),
+            'status_code': _int_column(df, 'status_code', default=200),
+            'response_size': _int_column(df, 'response_size', default=0),
+            # Labels default to "Analyzing..." (will be filled by ML in main.py)
+            'attack_type': _text_column(df, 'attack_type', default='Analyzing...'),
+            'is_successful': _bool_column(df, 'is_successful'),
+            'confidence': _float_column(df, 'confidence', default=0.0),
+            'rule_hits': _literal_column(df, 'rule_hits', list),
+        }
+        names = list(columns)
+        construct = UnifiedEvent.model_construct
+        return [construct(**dict(zip(names, row))) for row in zip(*columns.values())]
+
+    @staticmethod
+    def load_json(source: Union[str, IO]) -> List[UnifiedEvent]:
+        try:
+            if isinstance(source, str):
+                with open(source, 'r') as f:
+                    data = json.load(f)
+            else:
+                data = json.load(source)
             return [UnifiedEvent(**item) for item in data]
         except Exception as e:
-            print(f"Error loading JSON {path}: {e}")
+            logger.warning("Error loading JSON %s: %s", source, e)
             return []
+
+    @staticmethod
+    def iter_jsonl(
+        source: Union[str, IO],
+        chunksize: int = 50000,
+        stats: Optional[Dict[str, int]] = None
+    ) -> Iterator[List[UnifiedEvent]]:
+        """
+        Yield events from newline-delimited JSON, one line at a time.
+        Malformed lines are counted in stats["malformed"] and skipped.
+        """
+        if stats is None:
+            stats = {}
+        stats.setdefault("malformed", 0)
+        f = open(source, 'rb') if isinstance(source, str) else source
+        try:
+            chunk = []
+            for line in f:
+                if not line.strip():
+                    continue
+                event = _parse_event(line, stats)
+                if event is not None:
+                    chunk.append(event)
+                if len(chunk) >= chunksize:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            if isinstance(source, str):
+                f.close()
+
+    @staticmethod
+    def iter_json_array(
+        source: Union[str, IO],
+        chunksize: int = 50000,
+        stats: Optional[Dict[str, int]] = None
+    ) -> Iterator[List[UnifiedEvent]]:
+        """
+        Yield events from a top-level JSON array without loading it whole.
+        Elements are decoded one at a time from a rolling text buffer.
+        Invalid elements are counted in stats["malformed"] and skipped; a
+        syntax error stops the stream since the array can't be resynced.
+        """
+        if stats is None:
+            stats = {}
+        stats.setdefault("malformed", 0)
+        f = open(source, 'rb') if isinstance(source, str) else source
+        decoder = json.JSONDecoder()
+        text = codecs.getincrementaldecoder('utf-8')()
+        buffer, pos, eof = "", 0, False
+        started = False
+
+        def fill():
+            nonlocal buffer, pos, eof
+            block = f.read(JSON_READ_SIZE)
+            if isinstance(block, str):
+                block = block.encode('utf-8')
+            eof = not block
+            buffer = buffer[pos:] + text.decode(block, final=eof)
+            pos = 0
+
+        try:
+            chunk = []
+            while True:
+                # Skip whitespace and separators
+                while True:
+                    while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                        pos += 1
+                    if pos < len(buffer) or eof:
+                        break
+                    fill()
+                if pos >= len(buffer):
+                    break
+                if not started:
+                    started = True
+                    if buffer[pos] == '[':
+                        pos += 1
+                        continue
+                if buffer[pos] == ']':
+                    break
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof or len(buffer) - pos > JSON_MAX_OBJECT_BYTES:
+                        stats["malformed"] += 1
+                        break
+                    fill()
+                    continue
+                pos = end
+                event = _validate_event(item, stats)
+                if event is not None:
+                    chunk.append(event)
+                if len(chunk) >= chunksize:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            if isinstance(source, str):
+                f.close()
+
+
+def _validate_event(item, stats: Dict[str, int]) -> Optional[UnifiedEvent]:
+    try:
+        return UnifiedEvent.model_validate(item)
+    except Exception:
+        stats["malformed"] += 1
+        return None
+
+
+def _parse_event(line: bytes, stats: Dict[str, int]) -> Optional[UnifiedEvent]:
+    try:
+        item = _loads(line)
+    except Exception:
+        stats["malformed"] += 1
+        return None
+    return _validate_event(item, stats)
@@ -0,0 +1,60 @@
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[QueueHandler] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def start_logging(level: str = "INFO", logger_name: str = "src"):
+    """
+    Route the application's loggers through a queue: callers only enqueue
+    the record, and a background thread formats and writes it.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return
+    records: "queue.SimpleQueue" = queue.SimpleQueue()
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter())
+    _listener = QueueListener(records, output, respect_handler_level=True)
+    _handler = QueueHandler(records)
+
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(level)
+    logger.addHandler(_handler)
+    _listener.start()
+
+
+def stop_logging(logger_name: str = "src"):
+    """Flush queued records and detach the queue handler."""
+    global _listener, _handler
+    if _listener is None:
+        return
+    logging.getLogger(logger_name).removeHandler(_handler)
+    _listener.stop()
+    _listener = None
+    _handler = None
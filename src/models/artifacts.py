@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import time
+import numpy as np
+from typing import Optional
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+ARTIFACT_FORMAT = "tfidf-linear"
+FORMAT_VERSION = 1
+
+# Array files of an artifact; each is loaded with mmap_mode='r' so worker
+# processes share one physical copy through the page cache
+ARRAY_FILES = ("vocabulary", "idf", "coef", "intercept")
+
+# Vectorizer settings that affect features; all JSON-serializable
+VECTORIZER_PARAMS = (
+    "analyzer", "ngram_range", "lowercase", "max_features", "norm",
+    "use_idf", "smooth_idf", "sublinear_tf", "binary", "strip_accents",
+)
+
+
+class ModelArtifactError(Exception):
+    """A model artifact is missing, incomplete or inconsistent."""
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_artifact(pipeline: Pipeline, path: str, version: Optional[str] = None) -> dict:
+    """
+    Write a fitted TF-IDF + linear pipeline as plain .npy arrays plus a
+    manifest.json describing the version, classes and checksums.
+    """
+    tfidf = pipeline.named_steps['tfidf']
+    clf = pipeline.named_steps['clf']
+
+    terms = [None] * len(tfidf.vocabulary_)
+    for term, index in tfidf.vocabulary_.items():
+        terms[index] = term
+    arrays = {
+        "vocabulary": np.array(terms, dtype=str),
+        "idf": np.asarray(tfidf.idf_, dtype=np.float64),
+        "coef": np.asarray(clf.coef_, dtype=np.float64),
+        "intercept": np.asarray(clf.intercept_, dtype=np.float64),
+    }
+
+    os.makedirs(path, exist_ok=True)
+    checksums = {}
+    for name, array in arrays.items():
+        file_path = os.path.join(path, f"{name}.npy")
+        np.save(file_path, array)
+        checksums[name] = _sha256(file_path)
+
+    params = tfidf.get_params()
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "format_version": FORMAT_VERSION,
+        "model_version": version or time.strftime("%Y%m%d%H%M%S"),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "classes": [str(c) for c in clf.classes_],
+        "vectorizer": {k: params[k] for k in VECTORIZER_PARAMS},
+        "sha256": checksums,
+    }
+    with open(os.path.join(path, "manifest.json"), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_artifact(path: str, verify: bool = True):
+    """
+    Rebuild a fitted pipeline from an artifact directory with memory-mapped
+    arrays. Returns (pipeline, manifest); raises ModelArtifactError when the
+    artifact is missing or corrupt.
+    """
+    manifest_path = os.path.join(path, "manifest.json")
+    if not os.path.isfile(manifest_path):
+        raise ModelArtifactError(f"No model artifact at {path} (manifest.json not found)")
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ModelArtifactError(f"Unreadable manifest in {path}: {e}")
+
+    if manifest.get("format") != ARTIFACT_FORMAT or manifest.get("format_version") != FORMAT_VERSION:
+        raise ModelArtifactError(
+            f"Unsupported artifact format {manifest.get('format')!r} "
+            f"v{manifest.get('format_version')} in {path}")
+
+    arrays = {}
+    for name in ARRAY_FILES:
+        file_path = os.path.join(path, f"{name}.npy")
+        if verify and _sha256_or_none(file_path) != manifest.get("sha256", {}).get(name):
+            raise ModelArtifactError(f"Checksum mismatch for {file_path}")
+        try:
+            arrays[name] = np.load(file_path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            raise ModelArtifactError(f"Cannot load {file_path}: {e}")
+
+    classes = np.array(manifest.get("classes", []))
+    n_features = len(arrays["vocabulary"])
+    n_rows = 1 if len(classes) == 2 else len(classes)
+    if (len(classes) < 2 or arrays["idf"].shape != (n_features,)
+            or arrays["coef"].shape != (n_rows, n_features)
+            or arrays["intercept"].shape != (n_rows,)):
+        raise ModelArtifactError(f"Array shapes in {path} don't match its manifest")
+
+    params = dict(manifest["vectorizer"])
+    params["ngram_range"] = tuple(params["ngram_range"])
+    tfidf = TfidfVectorizer(**params)
+    tfidf.vocabulary_ = {term: i for i, term in enumerate(arrays["vocabulary"].tolist())}
+    tfidf.idf_ = arrays["idf"]
+
+    clf = LogisticRegression()
+    clf.classes_ = classes
+    clf.coef_ = arrays["coef"]
+    clf.intercept_ = arrays["intercept"]
+    clf.n_features_in_ = n_features
+
+    return Pipeline([('tfidf', tfidf), ('clf', clf)]), manifest
+
+
+def _sha256_or_none(path: str) -> Optional[str]:
+    try:
+        return _sha256(path)
+    except OSError:
+        return None
+
+
+if __name__ == "__main__":
+    import sys
+    # Usage: python -m src.models.artifacts models/tfidf/v1 [num_events] [version]
+    from src.generation.synthetic import SyntheticLogGenerator
+    from src.models.baseline import TFIDFClassifier
+
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else "models/tfidf/v1"
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    clf = TFIDFClassifier()
+    clf.train(SyntheticLogGenerator().generate_events(count))
+    manifest = clf.save_artifact(out_dir, version=sys.argv[3] if len(sys.argv) > 3 else None)
+    print(f"Saved model artifact {manifest['model_version']!r} to {out_dir}")
@@ -1,10 +1,12 @@
 import pickle
+import time
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
 from typing import List, Union
 from src.schema.events import UnifiedEvent
+from src.models import artifacts
 
 class TFIDFClassifier:
     """
@@ -19,6 +21,10 @@ class TFIDFClassifier:
             ('clf', LogisticRegression(class_weight='balanced', max_iter=1000))
         ])
         self.is_trained = False
+        # Identifies the fitted weights; changes on every train/load
+        self.version = None
+        # Set when the weights are memory-mapped from an artifact directory
+        self.artifact_path = None
 
     def _extract_features(self, events: List[UnifiedEvent]) -> List[str]:
         """Combine URL and Payload into a single text feature."""
@@ -29,11 +35,18 @@ class TFIDFClassifier:
             features.append(text)
         return features
 
+    @property
+    def classes(self) -> List[str]:
+        """Class labels in predict_proba column order (empty until trained)."""
+        return list(self.pipeline.classes_) if self.is_trained else []
+
     def train(self, events: List[UnifiedEvent]):
         X = self._extract_features(events)
         y = [e.attack_type for e in events]
         self.pipeline.fit(X, y)
         self.is_trained = True
+        self.version = f"trained-{time.time_ns()}"
+        self.artifact_path = None
         print("TF-IDF Classifier trained successfully.")
 
     def predict(self, texts: List[str]) -> List[str]:
@@ -57,3 +70,33 @@ class TFIDFClassifier:
         with open(path, 'rb') as f:
             self.pipeline = pickle.load(f)
         self.is_trained = True
+        self.version = f"pickle-{time.time_ns()}"
+        self.artifact_path = None
+
+    def save_artifact(self, path: str, version: str = None) -> dict:
+        """Save as a versioned, memory-mappable artifact directory."""
+        manifest = artifacts.save_artifact(self.pipeline, path, version)
+        self.version = manifest["model_version"]
+        return manifest
+
+    def load_artifact(self, path: str) -> dict:
+        """Load an artifact saved by save_artifact; arrays stay memory-mapped."""
+        self.pipeline, manifest = artifacts.load_artifact(path)
+        self.is_trained = True
+        self.version = manifest["model_version"]
+        self.artifact_path = path
+        return manifest
+
+    def __getstate__(self):
+        # Artifact-backed models travel as their path, so worker processes
+        # map the same files instead of receiving private copies
+        if self.artifact_path is not None:
+            return {"artifact_path": self.artifact_path}
+        return self.__dict__
+
+    def __setstate__(self, state):
+        if set(state) == {"artifact_path"}:
+            self.__init__()
+            self.load_artifact(state["artifact_path"])
+        else:
+            self.__dict__.update(state)
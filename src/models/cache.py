@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of classification results keyed by the request
+    text. Entries are tied to a model version and dropped when it changes.
+    A max_size of 0 disables caching.
+    """
+
+    def __init__(self, max_size: int = 100000):
+        self.max_size = max(0, max_size)
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.version: Optional[Hashable] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(method: str, url: str, payload: Optional[str]) -> str:
+        """
+        The "method url payload" text the model scores. Case is kept: the
+        model sees it, so "get" and "GET" can score differently.
+        """
+        return f"{method} {url} {payload or ''}"
+
+    def check_version(self, version: Hashable):
+        """Drop every entry if the model (or rule set) changed."""
+        with self._lock:
+            if version != self.version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.version = version
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_size == 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "model_version": str(self.version) if self.version is not None else None,
+        }
@@ -0,0 +1,91 @@
+import pickle
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from typing import List, Optional
+from src.schema.events import UnifiedEvent
+from src.generation.synthetic import SyntheticLogGenerator
+
+
+class HashingClassifier:
+    """
+    Online Model: hashed char n-grams + SGD logistic regression.
+    Features: URL + Payload (concatenated), same text as TFIDFClassifier
+    Target: Attack Type
+
+    The hashing vectorizer is stateless, so there is no vocabulary to fit and
+    the linear model can learn incrementally with partial_fit, one batch at a
+    time, without holding the training set in memory.
+    """
+
+    def __init__(self, classes: Optional[List[str]] = None, n_features: int = 2 ** 18):
+        self.vectorizer = HashingVectorizer(
+            analyzer='char_wb', ngram_range=(2, 4), n_features=n_features,
+            alternate_sign=False, norm='l2'
+        )
+        self.label_set = list(classes or SyntheticLogGenerator.ATTACK_TYPES)
+        self.clf = self._new_classifier()
+        self.is_trained = False
+        self.version = None
+        self.updates = 0
+
+    @staticmethod
+    def _new_classifier() -> SGDClassifier:
+        return SGDClassifier(loss='log_loss', alpha=1e-6, random_state=42)
+
+    def _extract_features(self, events: List[UnifiedEvent]) -> List[str]:
+        """Combine URL and Payload into a single text feature."""
+        return [f"{e.method} {e.url} {e.payload or ''}" for e in events]
+
+    @property
+    def classes(self) -> List[str]:
+        """Class labels in predict_proba column order (empty until trained)."""
+        return list(self.clf.classes_) if self.is_trained else []
+
+    def train(self, events: List[UnifiedEvent], epochs: int = 5, batch_size: int = 10000):
+        """Train from scratch, streaming the events in batches."""
+        self.clf = self._new_classifier()
+        self.is_trained = False
+        for _ in range(epochs):
+            for start in range(0, len(events), batch_size):
+                self.partial_fit(events[start:start + batch_size])
+        print("Hashing Classifier trained successfully.")
+
+    def partial_fit(self, events: List[UnifiedEvent]) -> int:
+        """
+        Update the model with one batch of labeled events. Events whose label
+        is outside the known class set are skipped; returns how many were used.
+        """
+        known = set(self.label_set)
+        labeled = [e for e in events if e.attack_type in known]
+        if not labeled:
+            return 0
+        X = self.vectorizer.transform(self._extract_features(labeled))
+        y = [e.attack_type for e in labeled]
+        self.clf.partial_fit(X, y, classes=self.label_set)
+        self.is_trained = True
+        self.updates += 1
+        self.version = f"online-{id(self)}-{self.updates}"
+        return len(labeled)
+
+    def predict(self, texts: List[str]) -> List[str]:
+        if not self.is_trained:
+            # Return "Normal" by default if not trained
+            return ["Normal"] * len(texts)
+        return self.clf.predict(self.vectorizer.transform(texts)).tolist()
+
+    def predict_proba(self, texts: List[str]):
+        if not self.is_trained:
+            # Return uniform probability [0.5, 0.5] if not trained
+            return np.array([[0.5, 0.5]] * len(texts))
+        return self.clf.predict_proba(self.vectorizer.transform(texts))
+
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            pickle.dump((self.label_set, self.clf, self.updates), f)
+
+    def load(self, path: str):
+        with open(path, 'rb') as f:
+            self.label_set, self.clf, self.updates = pickle.load(f)
+        self.is_trained = True
+        self.version = f"online-{id(self)}-{self.updates}"
@@ -0,0 +1,217 @@
+import math
+import multiprocessing
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
+from src.schema.events import UnifiedEvent
+from src.models.baseline import TFIDFClassifier
+from src.models.cache import PredictionCache
+from src.models.rules import RuleBasedDetector
+
+# (method, url, payload, confidence) for one event
+Fields = Tuple[str, str, Optional[str], float]
+# (attack_type, confidence, rule_hits) to write back, or None to leave as is,
+# plus the rule matches of the event
+Result = Tuple[Optional[Tuple[str, float, Optional[List[str]]]], Dict[str, list]]
+
+
+class ClassificationPipeline:
+    """
+    Labels uploaded events: rules first, then the ML model for rule misses.
+
+    With `workers` > 1, uploads larger than `shard_size` are split into one
+    shard per worker (but no smaller than `shard_size` events) and
+    classified on a process pool. Each worker
+    receives the rules and model once at startup, and shard results are
+    merged back in the original order.
+
+    Results are cached per "method url payload" text, the same text the
+    model scores, so repeated requests (and duplicates within one upload)
+    are classified only once until the model version changes.
+    """
+
+    def __init__(
+        self,
+        rules: RuleBasedDetector,
+        model: TFIDFClassifier,
+        batch_size: int = 1024,
+        workers: int = 0,
+        shard_size: int = 2000,
+        cache_size: int = 100000
+    ):
+        self.rules = rules
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.workers = workers
+        self.shard_size = max(1, shard_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.cache = PredictionCache(cache_size)
+
+    def classify(self, events: List[UnifiedEvent], stats: Optional[dict] = None) -> List[Dict[str, list]]:
+        """
+        Fill in attack_type, confidence and rule_hits for events that don't
+        carry a prediction yet. Returns the rule matches of every event.
+
+        If `stats` is given, seconds and rows spent in the rules and the
+        model are added to it (in-process classification only).
+        """
+        fields = [(e.method, e.url, e.payload, e.confidence) for e in events]
+        results = self.classify_cached(fields, stats)
+
+        rule_matches = []
+        for event, (label, matches) in zip(events, results):
+            if label is not None:
+                event.attack_type, event.confidence, rule_hits = label
+                if rule_hits is not None:
+                    event.rule_hits = list(rule_hits)
+            rule_matches.append(matches)
+        return rule_matches
+
+    def classify_cached(self, fields: List[Fields], stats: Optional[dict] = None) -> List[Result]:
+        """
+        classify_fields with the prediction cache in front: only texts that
+        are neither cached nor already seen in this batch reach the rules
+        and the model. A text reaches the model only if some event with it
+        needs a prediction; otherwise its entry holds the rule matches alone
+        (label None) and is upgraded the first time a label is needed.
+        """
+        cache = self.cache
+        cache.check_version((id(self.rules), id(self.model), self.model.version))
+
+        cached: List = [None] * len(fields)
+        missing: Dict[str, List[int]] = {}
+        for i, (method, url, payload, confidence) in enumerate(fields):
+            key = cache.key(method, url, payload)
+            if key in missing:
+                missing[key].append(i)
+                continue
+            hit = cache.get(key)
+            if hit is None or (hit[0] is None and confidence <= 0.1):
+                missing[key] = [i]
+            else:
+                cached[i] = hit
+
+        if missing:
+            # One representative per text, needing a label if any of its events does
+            unique = [
+                fields[idx[0]][:3] + (min(fields[i][3] for i in idx),)
+                for idx in missing.values()
+            ]
+            for (key, idx), result in zip(missing.items(), self._classify_unique(unique, stats)):
+                cache.put(key, result)
+                for i in idx:
+                    cached[i] = result
+
+        # Events that already carry a prediction keep it
+        return [
+            (label if confidence <= 0.1 else None, matches)
+            for (_, _, _, confidence), (label, matches) in zip(fields, cached)
+        ]
+
+    def _classify_unique(self, fields: List[Fields], stats: Optional[dict] = None) -> List[Result]:
+        if self.workers > 1 and len(fields) > self.shard_size:
+            shards = self._shards(fields)
+            return [r for shard in self._pool().map(_classify_shard, shards) for r in shard]
+        return self.classify_fields(fields, stats)
+
+    def _shards(self, fields: List[Fields]) -> List[List[Fields]]:
+        """Split `fields` evenly across the workers."""
+        size = max(self.shard_size, math.ceil(len(fields) / self.workers))
+        return [fields[i:i + size] for i in range(0, len(fields), size)]
+
+    def classify_fields(self, fields: List[Fields], stats: Optional[dict] = None) -> List[Result]:
+        """Classify plain event fields; this is what runs inside workers."""
+        # 1. Rules (kept for every event so /explain needs no re-scan)
+        start = time.perf_counter()
+        rule_matches = [self.rules.analyze_text(url, payload) for _, url, payload, _ in fields]
+        labels: List = [None] * len(fields)
+        if stats is not None:
+            _add(stats, "rules", time.perf_counter() - start, len(fields))
+
+        pending = []
+        for i, ((method, url, payload, confidence), matches) in enumerate(zip(fields, rule_matches)):
+            # Simple heuristic: if confidence is 0.0, we probably need to predict
+            if confidence > 0.1:
+                continue
+            if matches:
+                # First matching attack type, all rule descriptions flattened;
+                # rule hits are 100% confident for this demo
+                hits = [name for names in matches.values() for name in names]
+                labels[i] = (next(iter(matches)), 1.0, hits)
+            else:
+                pending.append(i)
+
+        # 2. ML probability for rule misses, one predict_proba per batch
+        model_start = time.perf_counter()
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            # Same "method url payload" text the model was trained on, and the cache key
+            texts = [PredictionCache.key(*fields[i][:3]) for i in batch]
+            attack_types, confidences = self._labels(self.model.predict_proba(texts))
+            for i, attack_type, confidence in zip(batch, attack_types, confidences):
+                labels[i] = (attack_type, confidence, None)
+        if stats is not None:
+            _add(stats, "model", time.perf_counter() - model_start, len(pending))
+
+        return list(zip(labels, rule_matches))
+
+    def _labels(self, probs: np.ndarray):
+        """Attack type and confidence for each row of predict_proba output."""
+        confidences = probs.max(axis=1).astype(float).tolist()
+        classes = self.model.classes
+        if classes:
+            best = probs.argmax(axis=1)
+            return [classes[i] for i in best], confidences
+        # Untrained model: assume class 1 is Attack if 2 classes
+        if probs.shape[1] > 1:
+            attack = probs[:, 1] > 0.5
+        else:
+            attack = np.zeros(len(probs), dtype=bool)
+        return ["Attack" if a else "Normal" for a in attack], confidences
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Not fork: the pool starts from an upload thread while others (the
+            # logging listener, the RSS sampler) may hold locks a child would copy
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                # Import the classifier stack once in the server, not per worker
+                context.set_forkserver_preload([__name__])
+            else:
+                context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.rules, self.model, self.batch_size)
+            )
+        return self._executor
+
+    def restart(self):
+        """Drop the worker pool so the next upload picks up new rules or model."""
+        self.shutdown()
+        self.cache.clear()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+def _add(stats: dict, stage: str, seconds: float, rows: int):
+    stats[f"{stage}_seconds"] = stats.get(f"{stage}_seconds", 0.0) + seconds
+    stats[f"{stage}_rows"] = stats.get(f"{stage}_rows", 0) + rows
+
+
+# Per-process pipeline, built once by the pool initializer
+_WORKER_PIPELINE: Optional[ClassificationPipeline] = None
+
+
+def _init_worker(rules: RuleBasedDetector, model: TFIDFClassifier, batch_size: int):
+    global _WORKER_PIPELINE
+    _WORKER_PIPELINE = ClassificationPipeline(rules, model, batch_size=batch_size, cache_size=0)
+
+
+def _classify_shard(fields: List[Fields]) -> List[Result]:
+    return _WORKER_PIPELINE.classify_fields(fields)
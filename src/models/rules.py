@@ -1,5 +1,6 @@
 import re
-from typing import List, Dict
+import json
+from typing import List, Dict, Optional, Tuple
 from src.schema.events import UnifiedEvent
 
 class RuleBasedDetector:
@@ -34,29 +35,76 @@ class RuleBasedDetector:
         ]
     }
 
+    def __init__(self, rules: Optional[Dict[str, List[Tuple[str, str]]]] = None):
+        self.rules = rules if rules is not None else self.RULES
+        self._compile()
+
+    @classmethod
+    def from_file(cls, path: str) -> "RuleBasedDetector":
+        """
+        Load rules from a JSON file shaped like RULES:
+        {"SQLi": [["UNION SELECT", "Union Based SQLi"], ...], ...}
+        """
+        with open(path, 'r') as f:
+            data = json.load(f)
+        rules = {attack_type: [(pattern, name) for pattern, name in entries]
+                 for attack_type, entries in data.items()}
+        return cls(rules)
+
+    def _compile(self):
+        """
+        Compile every rule into one case-insensitive pattern.
+
+        Each rule becomes an optional lookahead with its own named group, so
+        a single scan reports every rule that matches, including rules that
+        start at the same position. The leading alternation lets the scan
+        skip positions where no rule can start.
+        """
+        self._rule_info = []  # (attack_type, rule name) per rule
+        lookaheads = []
+        for attack_type, rules in self.rules.items():
+            for pattern, rule_name in rules:
+                i = len(self._rule_info)
+                self._rule_info.append((attack_type, rule_name))
+                lookaheads.append(f"(?:(?=(?P<r{i}>{pattern}))|)")
+
+        self._pattern = None
+        if lookaheads:
+            any_rule = "|".join(f"(?:{pattern})" for t in self.rules.values() for pattern, _ in t)
+            self._pattern = re.compile(f"(?=(?:{any_rule})){''.join(lookaheads)}", re.IGNORECASE)
+            # Rule patterns may contain their own groups, so map by name
+            self._group_of = [self._pattern.groupindex[f"r{i}"] for i in range(len(self._rule_info))]
+
     def analyze(self, event: UnifiedEvent) -> Dict[str, list]:
         """
         Returns a dict of {attack_type: [list of rule names hit]}
         """
+        return self.analyze_text(event.url, event.payload)
+
+    def analyze_many(self, events: List[UnifiedEvent]) -> List[Dict[str, list]]:
+        return [self.analyze_text(e.url, e.payload) for e in events]
+
+    def analyze_text(self, url: str, payload: Optional[str] = None) -> Dict[str, list]:
         hits = {}
-        combined_text = f"{event.url} {event.payload or ''}"
         
-        # Regex Checks
-        for attack_type, rules in self.RULES.items():
-            for pattern, rule_name in rules:
-                if re.search(pattern, combined_text, re.IGNORECASE):
-                    if attack_type not in hits:
-                        hits[attack_type] = []
-                    hits[attack_type].append(rule_name)
+        # Regex Checks, all rules in one scan
+        if self._pattern is not None:
+            matched = set()
+            for m in self._pattern.finditer(f"{url} {payload or ''}"):
+                groups = m.groups()
+                for i, group in enumerate(self._group_of):
+                    if groups[group - 1] is not None:
+                        matched.add(i)
+            # Report in rule-set order so the first attack type stays stable
+            for i in sorted(matched):
+                attack_type, rule_name = self._rule_info[i]
+                hits.setdefault(attack_type, []).append(rule_name)
                     
-        # HPP Check (heuristics on URL query)
-        if "?" in event.url:
-            query = event.url.split("?", 1)[1]
-            params = query.split("&")
-            keys = [p.split("=")[0] for p in params]
+        # HPP Check (heuristics on URL query); needs at least two params
+        if "?" in url and "&" in url:
+            query = url.split("?", 1)[1]
+            keys = [p.split("=", 1)[0] for p in query.split("&")]
             if len(keys) != len(set(keys)):
-                if "HPP" not in hits:
-                    hits["HPP"] = []
-                hits["HPP"].append("Duplicate Parameters")
+                hits.setdefault("HPP", []).append("Duplicate Parameters")
 
         return hits
@@ -1,3 +1,4 @@
+import numpy as np
 from typing import List
 from src.schema.events import UnifiedEvent
 
@@ -50,7 +51,24 @@ class SuccessClassifier:
         return False
 
     def batch_predict(self, events: List[UnifiedEvent], attack_types: List[str]) -> List[bool]:
-        return [
-            self.predict(e, pred_type) 
-            for e, pred_type in zip(events, attack_types)
-        ]
+        n = len(events)
+        status_codes = np.fromiter((e.status_code for e in events), dtype=np.int64, count=n)
+        response_sizes = np.fromiter((e.response_size for e in events), dtype=np.int64, count=n)
+        return self.predict_columns(status_codes, response_sizes, attack_types).tolist()
+
+    def predict_columns(self, status_codes: np.ndarray, response_sizes: np.ndarray, attack_types) -> np.ndarray:
+        """
+        Same rules as predict, evaluated as masks over whole columns.
+        Returns a boolean array.
+        """
+        status_codes = np.asarray(status_codes)
+        response_sizes = np.asarray(response_sizes)
+        attack_types = np.asarray(attack_types, dtype=str)
+
+        # Every success rule requires a 200; Normal, 403 and 500 never succeed
+        ok = status_codes == 200
+        return ok & (
+            (attack_types == "SQLi")
+            | (attack_types == "SSRF")
+            | ((attack_types == "Traversal") & (response_sizes > 100))
+        )
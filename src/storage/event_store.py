@@ -0,0 +1,822 @@
+import bisect
+import threading
+import numpy as np
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Iterable, Tuple
+from src.schema.events import UnifiedEvent
+from src.storage.indexes import SortedPosting, PostingIndex
+from src.storage.timeline import TimelineRollup
+from src.storage.heavy_hitters import AttackerTracker
+
+
+class NumericColumn:
+    """
+    Growable NumPy array with amortized O(1) appends.
+    """
+
+    def __init__(self, dtype, capacity: int = 1024):
+        self.dtype = np.dtype(dtype)
+        self._data = np.zeros(capacity, dtype=self.dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def values(self) -> np.ndarray:
+        """View of the populated part of the column."""
+        return self._data[:self._size]
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.dtype)
+        needed = self._size + len(values)
+        if needed > len(self._data):
+            capacity = max(needed, 2 * len(self._data))
+            grown = np.zeros(capacity, dtype=self.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:needed] = values
+        self._size = needed
+
+    def truncate(self, size: int):
+        self._size = min(self._size, size)
+
+    def drop(self, count: int):
+        """Remove the first `count` rows and release their memory."""
+        self._data = self.values[count:].copy()
+        self._size = len(self._data)
+
+    def clear(self):
+        self._data = np.zeros(1024, dtype=self.dtype)
+        self._size = 0
+
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+
+class CategoricalColumn:
+    """
+    Dictionary-encoded column: each distinct value is stored once and rows
+    hold an int32 code into the dictionary.
+    """
+
+    # Unused dictionary entries tolerated before compact() rebuilds
+    COMPACT_MIN_UNUSED = 1024
+
+    def __init__(self):
+        self.dictionary: List = []
+        self._lookup: Dict = {}
+        self.codes = NumericColumn(np.int32)
+        self._dictionary_bytes = 0
+
+    def __len__(self):
+        return len(self.codes)
+
+    def encode(self, value) -> int:
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.dictionary)
+            self._lookup[value] = code
+            self.dictionary.append(value)
+            self._dictionary_bytes += len(str(value))
+        return code
+
+    def code_of(self, value) -> int:
+        """Code for an existing value, or -1 if it was never stored."""
+        return self._lookup.get(value, -1)
+
+    def extend(self, values: Iterable):
+        self.codes.extend([self.encode(v) for v in values])
+
+    def get(self, row: int):
+        return self.dictionary[self.codes.values[row]]
+
+    def truncate(self, size: int):
+        # Dictionary entries are kept; unused ones are harmless
+        self.codes.truncate(size)
+
+    def drop(self, count: int):
+        self.codes.drop(count)
+
+    def compact(self) -> Optional[np.ndarray]:
+        """
+        Drop dictionary entries no row uses once they outnumber the used
+        ones. Returns the old code -> new code map (-1 for dropped entries),
+        or None if the dictionary was left alone.
+        """
+        used = np.bincount(self.codes.values, minlength=len(self.dictionary)) > 0
+        live = int(used.sum())
+        if len(self.dictionary) - live <= max(live, self.COMPACT_MIN_UNUSED):
+            return None
+        remap = np.full(len(self.dictionary), -1, dtype=np.int32)
+        remap[used] = np.arange(live, dtype=np.int32)
+        dictionary = [value for value, keep in zip(self.dictionary, used.tolist()) if keep]
+        codes = remap[self.codes.values]
+        self.clear()
+        for value in dictionary:
+            self.encode(value)
+        self.codes.extend(codes)
+        return remap
+
+    def clear(self):
+        self.dictionary = []
+        self._lookup = {}
+        self.codes.clear()
+        self._dictionary_bytes = 0
+
+    def nbytes(self) -> int:
+        return self.codes.nbytes() + self._dictionary_bytes
+
+
+class StringBlob:
+    """
+    Read-only strings packed as one UTF-8 byte array plus row offsets
+    (typically memory-mapped from disk), decoded on access.
+    """
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray, nulls: Optional[np.ndarray] = None):
+        # Plain ndarray views index much faster than np.memmap objects
+        self.blob = np.asarray(blob)
+        self.offsets = np.asarray(offsets)
+        self.nulls = np.asarray(nulls) if nulls is not None else None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        if self.nulls is not None and self.nulls[i]:
+            return None
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        return iter(self.slice(0, len(self)))
+
+    def slice(self, start: int, end: int) -> List[Optional[str]]:
+        """Decode rows start..end with a single copy out of the blob."""
+        base = int(self.offsets[start])
+        data = self.blob[base:int(self.offsets[end])].tobytes()
+        bounds = (self.offsets[start:end + 1] - base).tolist()
+        nulls = self.nulls[start:end].tolist() if self.nulls is not None else [False] * (end - start)
+        return [
+            None if null else data[lo:hi].decode('utf-8')
+            for lo, hi, null in zip(bounds, bounds[1:], nulls)
+        ]
+
+    def nbytes(self) -> int:
+        return self.blob.nbytes + self.offsets.nbytes
+
+    @staticmethod
+    def pack(values: List[Optional[str]]):
+        """(blob, offsets, nulls) arrays for a list of strings."""
+        encoded = [v.encode('utf-8') if v is not None else b'' for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        nulls = np.array([v is None for v in values], dtype=np.bool_)
+        return blob, offsets, nulls
+
+
+class StringColumn:
+    """
+    High-cardinality strings: Python lists for rows appended in memory,
+    StringBlob chunks for rows loaded from disk.
+    """
+
+    def __init__(self):
+        self._chunks: List = []
+        self._starts: List[int] = []
+        self._size = 0
+        # Characters held in list chunks, kept current for cheap nbytes()
+        self._list_bytes = 0
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, row: int) -> Optional[str]:
+        i = bisect.bisect_right(self._starts, row) - 1
+        return self._chunks[i][row - self._starts[i]]
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield from chunk
+
+    def extend(self, values: Iterable[Optional[str]]):
+        if not self._chunks or not isinstance(self._chunks[-1], list):
+            self._starts.append(self._size)
+            self._chunks.append([])
+        chunk = self._chunks[-1]
+        before = len(chunk)
+        chunk.extend(values)
+        self._size += len(chunk) - before
+        self._list_bytes += sum(len(v) for v in chunk[before:] if v)
+
+    def extend_blob(self, blob: StringBlob):
+        if len(blob):
+            self._starts.append(self._size)
+            self._chunks.append(blob)
+            self._size += len(blob)
+
+    def slice(self, start: int, end: int) -> List[Optional[str]]:
+        out: List[Optional[str]] = []
+        i = max(bisect.bisect_right(self._starts, start) - 1, 0)
+        while i < len(self._chunks) and self._starts[i] < end:
+            chunk, first = self._chunks[i], self._starts[i]
+            lo, hi = max(start - first, 0), min(end - first, len(chunk))
+            out.extend(chunk[lo:hi] if isinstance(chunk, list) else chunk.slice(lo, hi))
+            i += 1
+        return out
+
+    def truncate(self, size: int):
+        while self._chunks and self._starts[-1] >= size:
+            chunk = self._chunks.pop()
+            self._starts.pop()
+            if isinstance(chunk, list):
+                self._list_bytes -= sum(len(v) for v in chunk if v)
+        if self._chunks:
+            keep = size - self._starts[-1]
+            if isinstance(self._chunks[-1], list):
+                self._list_bytes -= sum(len(v) for v in self._chunks[-1][keep:] if v)
+                del self._chunks[-1][keep:]
+            else:
+                blob = self._chunks[-1]
+                nulls = blob.nulls[:keep] if blob.nulls is not None else None
+                self._chunks[-1] = StringBlob(blob.blob, blob.offsets[:keep + 1], nulls)
+        self._size = min(self._size, size)
+
+    def drop(self, count: int):
+        """Remove the first `count` rows."""
+        count = min(count, self._size)
+        while self._chunks and self._starts[0] + len(self._chunks[0]) <= count:
+            chunk = self._chunks.pop(0)
+            self._starts.pop(0)
+            if isinstance(chunk, list):
+                self._list_bytes -= sum(len(v) for v in chunk if v)
+        if self._chunks and count > self._starts[0]:
+            skip = count - self._starts[0]
+            chunk = self._chunks[0]
+            if isinstance(chunk, list):
+                self._list_bytes -= sum(len(v) for v in chunk[:skip] if v)
+                del chunk[:skip]
+            else:
+                nulls = chunk.nulls[skip:] if chunk.nulls is not None else None
+                self._chunks[0] = StringBlob(chunk.blob, chunk.offsets[skip:], nulls)
+        self._starts = [max(start - count, 0) for start in self._starts]
+        self._size -= count
+
+    def clear(self):
+        self._chunks = []
+        self._starts = []
+        self._size = 0
+        self._list_bytes = 0
+
+    def nbytes(self) -> int:
+        return self._list_bytes + sum(c.nbytes() for c in self._chunks if isinstance(c, StringBlob))
+
+
+def to_epoch_us(ts: datetime) -> int:
+    """Naive datetimes are stored as-is; aware ones are normalized to UTC."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return int(np.datetime64(ts, 'us').astype(np.int64))
+
+
+class EventStore:
+    """
+    Columnar in-memory store for UnifiedEvents.
+
+    Numeric fields live in typed NumPy arrays and low-cardinality strings are
+    dictionary-encoded, so endpoints can aggregate with vectorized scans and
+    only build UnifiedEvent objects for the rows they actually return.
+
+    Filterable fields are indexed at insert time and a standing time order
+    is maintained, so paginated queries cost roughly the page size.
+
+    Writers take `lock` internally; readers that make several calls (query
+    then records) should hold it so a concurrent upload or clear can't
+    change rows underneath them.
+
+    Rows are identified by an insertion sequence number that never changes:
+    row r lives at position r - base of every column.
+
+    Optional retention limits (max events, approximate max bytes, max age
+    relative to the newest event) are enforced after every append by
+    evicting the oldest events first. Eviction trims the head of every
+    posting and, like a ring buffer, releases the leading run of evicted
+    rows by advancing `base`; surviving rows keep their ids, so nothing is
+    re-indexed. Rows evicted out of insertion order (older events uploaded
+    later) are unindexed at once and their storage is released when the
+    run reaches them. Eviction overshoots each size limit by EVICTION_SLACK
+    so it runs once per many appends.
+    """
+
+    # Rows scanned per step when intersecting several filters
+    SCAN_CHUNK = 1024
+    # Fraction below a size limit that eviction shrinks the store to
+    EVICTION_SLACK = 0.1
+
+    def __init__(
+        self,
+        top_ip_capacity: int = 10000,
+        max_events: int = 0,
+        max_bytes: int = 0,
+        max_age_seconds: int = 0
+    ):
+        self.lock = threading.RLock()
+        # Retention limits; 0 means unlimited
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.evicted_events = 0
+        self.eviction_runs = 0
+        # Id of the row at position 0
+        self.base = 0
+        # Bumped whenever postings are replaced or their codes change
+        self.generation = 0
+        # Cleared for evicted rows still held in the columns
+        self._alive = NumericColumn(np.bool_)
+
+        self.timestamp = NumericColumn(np.int64)  # microseconds since epoch
+        self.status_code = NumericColumn(np.int32)
+        self.response_size = NumericColumn(np.int64)
+        self.confidence = NumericColumn(np.float64)
+        self.is_successful = NumericColumn(np.bool_)
+
+        self.source_ip = CategoricalColumn()
+        self.method = CategoricalColumn()
+        self.attack_type = CategoricalColumn()
+        self.user_agent = CategoricalColumn()
+        # Headers and rule hits repeat heavily across events too
+        self.headers = CategoricalColumn()
+        self.rule_hits = CategoricalColumn()
+        # Per-type rule matches found at ingest: ((attack_type, rule name), ...)
+        self.rule_matches = CategoricalColumn()
+
+        # High-cardinality strings are stored as-is
+        self.event_id = StringColumn()
+        self.url = StringColumn()
+        self.payload = StringColumn()
+
+        # Secondary indexes
+        self.row_by_id: Dict[str, int] = {}
+        self.time_order = SortedPosting()
+        self.source_ip_index = PostingIndex()
+        self.attack_type_index = PostingIndex()
+        self.is_successful_index = PostingIndex()
+
+        # Aggregates maintained at ingest time
+        self.timeline = TimelineRollup()
+        self.attackers = AttackerTracker(top_ip_capacity)
+
+    def __len__(self):
+        return len(self.time_order)
+
+    @property
+    def end(self) -> int:
+        """Id the next appended row will get."""
+        return self.base + len(self.event_id)
+
+    def append(self, events: List[UnifiedEvent], rule_matches: Optional[List[Dict[str, list]]] = None):
+        """
+        Add a batch of events to the store, optionally with the
+        {attack_type: [rule names]} matches computed for each of them.
+        """
+        if not events:
+            return
+        with self.lock:
+            self._append(events, rule_matches)
+            self.enforce_retention()
+
+    def _append(self, events: List[UnifiedEvent], rule_matches: Optional[List[Dict[str, list]]]):
+        start = self.end
+        self._extend_columns(events, rule_matches)
+        self._index_rows(np.arange(start, self.end, dtype=np.int64))
+
+    def _extend_columns(self, events: List[UnifiedEvent], rule_matches: Optional[List[Dict[str, list]]]):
+        self.timestamp.extend([to_epoch_us(e.timestamp) for e in events])
+        self.status_code.extend([e.status_code for e in events])
+        self.response_size.extend([e.response_size for e in events])
+        self.confidence.extend([e.confidence for e in events])
+        self.is_successful.extend([e.is_successful for e in events])
+
+        self.source_ip.extend(e.source_ip for e in events)
+        self.method.extend(e.method for e in events)
+        self.attack_type.extend(e.attack_type for e in events)
+        self.user_agent.extend(e.user_agent for e in events)
+        self.headers.extend(tuple(sorted(e.headers.items())) for e in events)
+        self.rule_hits.extend(tuple(e.rule_hits) for e in events)
+        if rule_matches is None:
+            rule_matches = [{}] * len(events)
+        self.rule_matches.extend(
+            tuple((t, name) for t, names in m.items() for name in names) for m in rule_matches)
+
+        self.event_id.extend(e.event_id for e in events)
+        self.url.extend(e.url for e in events)
+        self.payload.extend(e.payload for e in events)
+        self._alive.extend(np.ones(len(events), dtype=np.bool_))
+
+    def _index_rows(self, rows: np.ndarray):
+        """Add rows (ascending ids) to the indexes and aggregates."""
+        positions = rows - self.base
+        self.row_by_id.update(zip(self._strings(self.event_id, positions), rows.tolist()))
+        ts = self.timestamp.values[positions]
+        self.time_order.add(rows, ts)
+        self.source_ip_index.add(self.source_ip.codes.values[positions], rows, ts)
+        self.attack_type_index.add(self.attack_type.codes.values[positions], rows, ts)
+        self.is_successful_index.add(
+            self.is_successful.values[positions].astype(np.int32), rows, ts)
+
+        self.timeline.add(ts, self.is_successful.values[positions])
+        for ip, attack_type, count in self._ip_type_counts(positions):
+            self.attackers.add(ip, attack_type, count)
+
+    def postings(self) -> Dict[str, PostingIndex]:
+        """Posting indexes by the column they index."""
+        return {
+            "source_ip": self.source_ip_index,
+            "attack_type": self.attack_type_index,
+            "is_successful": self.is_successful_index,
+        }
+
+    @staticmethod
+    def _strings(column: "StringColumn", positions: np.ndarray) -> List[Optional[str]]:
+        """Values at ascending positions, decoded with one slice of the column."""
+        if len(positions) == 0:
+            return []
+        lo, hi = int(positions[0]), int(positions[-1]) + 1
+        values = column.slice(lo, hi)
+        if hi - lo == len(positions):
+            return values
+        return [values[p] for p in (positions - lo).tolist()]
+
+    def _ip_type_counts(self, positions):
+        """(source_ip, attack_type, count) for every pair at the given column positions."""
+        ip_codes = self.source_ip.codes.values[positions].astype(np.int64)
+        type_codes = self.attack_type.codes.values[positions].astype(np.int64)
+        pairs, counts = np.unique((type_codes << 32) | ip_codes, return_counts=True)
+        for pair, count in zip(pairs.tolist(), counts.tolist()):
+            yield (self.source_ip.dictionary[pair & 0xFFFFFFFF],
+                   self.attack_type.dictionary[pair >> 32], count)
+
+    def clear(self):
+        with self.lock:
+            self._clear()
+
+    def columns(self) -> Dict[str, object]:
+        """Every per-row column by field name."""
+        return {
+            name: getattr(self, name) for name in (
+                "timestamp", "status_code", "response_size", "confidence",
+                "is_successful", "source_ip", "method", "attack_type",
+                "user_agent", "headers", "rule_hits", "rule_matches",
+                "event_id", "url", "payload")
+        }
+
+    def _truncate(self, end: int):
+        """Drop rows from id `end` on that were added but not indexed yet."""
+        for column in list(self.columns().values()) + [self._alive]:
+            column.truncate(end - self.base)
+
+    def _clear(self):
+        for column in list(self.columns().values()) + [self._alive]:
+            column.clear()
+        self.base = 0
+        self.generation += 1
+        self.row_by_id = {}
+        self.time_order = SortedPosting()
+        for index in self.postings().values():
+            index.clear()
+        self.timeline.clear()
+        self.attackers.clear()
+
+    # --- Retention ---
+
+    def enforce_retention(self) -> int:
+        """Evict the oldest events until every limit holds; returns how many."""
+        with self.lock:
+            evicted = 0
+            # Bytes are estimated per row, so re-check after each pass
+            count = self._eviction_count()
+            while count > 0:
+                self._evict(count)
+                evicted += count
+                count = self._eviction_count()
+            if evicted:
+                self._compact_dictionaries()
+            return evicted
+
+    def _eviction_count(self) -> int:
+        """How many of the oldest rows must go to satisfy the limits."""
+        n = len(self)
+        if n == 0:
+            return 0
+        count = 0
+        if self.max_events and n > self.max_events:
+            count = n - int(self.max_events * (1 - self.EVICTION_SLACK))
+        if self.max_bytes:
+            size = self.nbytes()
+            if size > self.max_bytes:
+                keep = int(n * self.max_bytes * (1 - self.EVICTION_SLACK) / size)
+                count = max(count, n - keep)
+        if self.max_age_seconds:
+            ts = self.time_order.ts
+            cutoff = int(ts[-1]) - self.max_age_seconds * 10**6
+            count = max(count, int(np.searchsorted(ts, cutoff, side='left')))
+        return min(count, n)
+
+    def _evict(self, count: int):
+        """Drop the `count` oldest events; the rows that stay keep their ids."""
+        rows = np.sort(self.time_order.rows[:count])
+        positions = rows - self.base
+        self.timeline.remove(self.timestamp.values[positions], self.is_successful.values[positions])
+        for ip, attack_type, n in self._ip_type_counts(positions):
+            self.attackers.remove(ip, attack_type, n)
+        for event_id, row in zip(self._strings(self.event_id, positions), rows.tolist()):
+            # Ids repeat across uploads; only drop the entry if it is this row's
+            if self.row_by_id.get(event_id) == row:
+                del self.row_by_id[event_id]
+
+        # Every posting is in (timestamp, row) order, so the evicted rows
+        # are exactly the head of each one
+        cut_ts, cut_row = int(self.time_order.ts[count - 1]), int(self.time_order.rows[count - 1])
+        self.time_order.trim(cut_ts, cut_row)
+        for index in self.postings().values():
+            index.trim(cut_ts, cut_row)
+
+        self._alive.values[positions] = False
+        alive = self._alive.values
+        released = int(np.argmax(alive)) if alive.any() else len(alive)
+        if released:
+            for column in list(self.columns().values()) + [self._alive]:
+                column.drop(released)
+            self.base += released
+
+        self.evicted_events += count
+        self.eviction_runs += 1
+
+    def _compact_dictionaries(self) -> bool:
+        """Shrink dictionaries left mostly unused by eviction; True if any changed."""
+        changed = False
+        postings = self.postings()
+        for name, column in self.columns().items():
+            if not isinstance(column, CategoricalColumn):
+                continue
+            remap = column.compact()
+            if remap is None:
+                continue
+            changed = True
+            if name in postings:
+                postings[name].remap(remap)
+        if changed:
+            self.generation += 1
+        return changed
+
+    def memory_stats(self) -> dict:
+        return {
+            "events": len(self),
+            "bytes": self.nbytes(),
+            "max_events": self.max_events,
+            "max_bytes": self.max_bytes,
+            "max_age_seconds": self.max_age_seconds,
+            "evicted_events": self.evicted_events,
+            "eviction_runs": self.eviction_runs,
+        }
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the store."""
+        columns = sum(c.nbytes() for c in self.columns().values())
+        columns += self._alive.nbytes()
+        # Dict slot plus int object per id-map entry
+        indexes = len(self.row_by_id) * 100
+        indexes += self.time_order._rows.nbytes + self.time_order._ts.nbytes + sum(
+            i.nbytes() for i in self.postings().values())
+        return columns + indexes + self.timeline.nbytes() + self.attackers.nbytes()
+
+    # --- Row access ---
+
+    def get(self, row: int) -> UnifiedEvent:
+        """Materialize a single row as a UnifiedEvent."""
+        row -= self.base
+        return UnifiedEvent.model_construct(
+            event_id=self.event_id[row],
+            timestamp=self.timestamp.values[row].astype('datetime64[us]').item(),
+            source_ip=self.source_ip.get(row),
+            method=self.method.get(row),
+            url=self.url[row],
+            user_agent=self.user_agent.get(row),
+            headers=dict(self.headers.get(row)),
+            payload=self.payload[row],
+            status_code=int(self.status_code.values[row]),
+            response_size=int(self.response_size.values[row]),
+            attack_type=self.attack_type.get(row),
+            is_successful=bool(self.is_successful.values[row]),
+            confidence=float(self.confidence.values[row]),
+            rule_hits=list(self.rule_hits.get(row)),
+        )
+
+    def records(self, rows: np.ndarray) -> List[dict]:
+        """
+        Rows as JSON-ready dicts in UnifiedEvent field order, built column by
+        column without going through pydantic.
+        """
+        rows = np.asarray(rows, dtype=np.int64) - self.base
+        positions = rows.tolist()
+
+        def decode(column: CategoricalColumn) -> list:
+            dictionary = column.dictionary
+            return [dictionary[c] for c in column.codes.values[rows].tolist()]
+
+        columns = {
+            "event_id": [self.event_id[r] for r in positions],
+            "timestamp": [t.isoformat() for t in self.timestamp.values[rows].astype('datetime64[us]').tolist()],
+            "source_ip": decode(self.source_ip),
+            "method": decode(self.method),
+            "url": [self.url[r] for r in positions],
+            "user_agent": decode(self.user_agent),
+            "headers": [dict(h) for h in decode(self.headers)],
+            "payload": [self.payload[r] for r in positions],
+            "status_code": self.status_code.values[rows].tolist(),
+            "response_size": self.response_size.values[rows].tolist(),
+            "attack_type": decode(self.attack_type),
+            "is_successful": self.is_successful.values[rows].tolist(),
+            "confidence": self.confidence.values[rows].tolist(),
+            "rule_hits": [list(h) for h in decode(self.rule_hits)],
+        }
+        keys = list(columns)
+        return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+    def find_row(self, event_id: str) -> Optional[int]:
+        return self.row_by_id.get(event_id)
+
+    def get_rule_matches(self, row: int) -> Dict[str, list]:
+        """Rule matches stored at ingest, grouped by attack type."""
+        matches: Dict[str, list] = {}
+        for attack_type, name in self.rule_matches.get(row - self.base):
+            matches.setdefault(attack_type, []).append(name)
+        return matches
+
+    # --- Indexed queries ---
+
+    def query(
+        self,
+        source_ip: Optional[str] = None,
+        attack_type: Optional[str] = None,
+        is_successful: Optional[bool] = None,
+        offset: int = 0,
+        limit: int = 100,
+        cursor: Optional[Tuple[int, int]] = None,
+        descending: bool = True,
+        start_us: Optional[int] = None,
+        end_us: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Row ids for one page of events matching the filters, newest first
+        unless `descending` is False. `start_us`/`end_us` bound the
+        timestamps (inclusive) with binary searches on the driving posting.
+
+        `cursor` is the (timestamp us, row id) key of the last event of the
+        previous page; the page continues strictly after it, so its cost
+        doesn't depend on how deep it is and rows added elsewhere in time
+        don't shift it. Row ids are unique and never reused, unlike event
+        ids, and the key stays valid after its row is evicted.
+        """
+        scan = self.scan(source_ip, attack_type, is_successful, cursor, descending, start_us, end_us)
+        return scan.next_page(offset, limit)
+
+    def scan(
+        self,
+        source_ip: Optional[str] = None,
+        attack_type: Optional[str] = None,
+        is_successful: Optional[bool] = None,
+        cursor: Optional[Tuple[int, int]] = None,
+        descending: bool = True,
+        start_us: Optional[int] = None,
+        end_us: Optional[int] = None
+    ) -> "QueryScan":
+        """A QueryScan over the matches of query(), to be read page by page."""
+        return QueryScan(self, source_ip, attack_type, is_successful, cursor, descending, start_us, end_us)
+
+    def cursor_of(self, row: int) -> Tuple[int, int]:
+        """The (timestamp, row id) cursor of a row."""
+        return int(self.timestamp.values[row - self.base]), int(row)
+
+class QueryScan:
+    """
+    The matches of one query, read a page at a time in time order.
+
+    The scan drives from the most selective posting and checks the other
+    filters per chunk. Between pages it keeps its place as positions in
+    that posting, so a page never re-resolves the previous one. If the
+    posting changed shape in between (an out-of-order insert, eviction or
+    clear), the scan re-plans from the (timestamp, row) key of the last row
+    it returned. Call next_page with the store lock held.
+    """
+
+    def __init__(
+        self,
+        store: EventStore,
+        source_ip: Optional[str],
+        attack_type: Optional[str],
+        is_successful: Optional[bool],
+        cursor: Optional[Tuple[int, int]],
+        descending: bool,
+        start_us: Optional[int],
+        end_us: Optional[int]
+    ):
+        self.store = store
+        self.source_ip = source_ip
+        self.attack_type = attack_type
+        self.is_successful = is_successful
+        self.descending = descending
+        self.start_us = start_us
+        self.end_us = end_us
+        self.last = cursor
+        self._plan()
+
+    def _plan(self):
+        store = self.store
+        filters = []  # (posting, codes array, code)
+        if self.source_ip:
+            code = store.source_ip.code_of(self.source_ip)
+            filters.append((store.source_ip_index.get(code), store.source_ip.codes, code))
+        if self.attack_type:
+            code = store.attack_type.code_of(self.attack_type)
+            filters.append((store.attack_type_index.get(code), store.attack_type.codes, code))
+        if self.is_successful is not None:
+            code = int(self.is_successful)
+            filters.append((store.is_successful_index.get(code), store.is_successful, code))
+
+        self.generation = store.generation
+        if any(posting is None for posting, _, _ in filters):
+            self.driver, self.rest, self.lo, self.hi = None, [], 0, 0
+            return
+        # Drive from the most selective posting and check the rest per chunk
+        filters.sort(key=lambda f: len(f[0]))
+        self.driver = filters[0][0] if filters else store.time_order
+        self.rest = [(column, code) for _, column, code in filters[1:]]
+        self.version = self.driver.version
+
+        lo, hi = self.driver.range(self.start_us, self.end_us)
+        if self.last is not None:
+            ts, row = self.last
+            if self.descending:
+                hi = max(min(hi, self.driver.seek(ts, row, after=False)), lo)
+            else:
+                lo = min(max(lo, self.driver.seek(ts, row, after=True)), hi)
+        self.lo, self.hi = lo, hi
+
+    def next_page(self, offset: int, limit: int) -> np.ndarray:
+        """Row ids of the next page, skipping `offset` matches first."""
+        if self.generation != self.store.generation or (
+                self.driver is not None and self.driver.version != self.version):
+            self._plan()
+        if self.driver is None:
+            return np.zeros(0, dtype=np.int64)
+        positions = self._positions(max(offset, 0), max(limit, 0))
+        if len(positions) == 0:
+            return np.zeros(0, dtype=np.int64)
+        rows = self.driver.rows[positions]
+        self.last = self.store.cursor_of(int(rows[-1]))
+        return rows
+
+    def _positions(self, offset: int, limit: int) -> np.ndarray:
+        """Driver positions of the next page; advances lo/hi past them."""
+        driver, lo, hi = self.driver, self.lo, self.hi
+        if not self.rest:
+            if self.descending:
+                end = max(hi - offset, lo)
+                start = max(end - limit, lo)
+                self.hi = start
+                return np.arange(end - 1, start - 1, -1, dtype=np.int64)
+            start = min(lo + offset, hi)
+            end = min(start + limit, hi)
+            self.lo = end
+            return np.arange(start, end, dtype=np.int64)
+
+        wanted = offset + limit
+        matched = []
+        found = 0
+        chunk = self.store.SCAN_CHUNK
+        while lo < hi and found < wanted:
+            if self.descending:
+                start = max(hi - chunk, lo)
+                positions = np.arange(hi - 1, start - 1, -1, dtype=np.int64)
+                hi = start
+            else:
+                end = min(lo + chunk, hi)
+                positions = np.arange(lo, end, dtype=np.int64)
+                lo = end
+            rows = driver.rows[positions] - self.store.base
+            keep = np.ones(len(positions), dtype=bool)
+            for column, code in self.rest:
+                keep &= column.values[rows] == code
+            matched.append(positions[keep])
+            found += int(keep.sum())
+        page = np.concatenate(matched)[offset:wanted] if matched else np.zeros(0, dtype=np.int64)
+        if found >= wanted and len(page):
+            # Resume right after the last row returned, not the end of the chunk
+            if self.descending:
+                hi = int(page[-1])
+            else:
+                lo = int(page[-1]) + 1
+        self.lo, self.hi = lo, hi
+        return page
@@ -0,0 +1,141 @@
+import heapq
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class TopKTracker:
+    """
+    Bounded-memory frequency counter.
+
+    Counts are exact until more than `capacity` distinct keys have been seen,
+    after which it switches to the Space-Saving algorithm: the least frequent
+    counter is recycled for the new key, so memory never exceeds `capacity`
+    entries and every key with a true count above N/capacity is retained.
+    Reported counts can then overestimate by at most `errors[key]`.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self.counts: Dict[Hashable, int] = {}
+        self.errors: Dict[Hashable, int] = {}
+        self.exact = True
+        # Lazy min-heap of (count, key); stale entries are skipped on pop
+        self._heap: List[Tuple[int, Hashable]] = []
+        self._ranked: Optional[List[Tuple[Hashable, int]]] = None
+
+    def __len__(self):
+        return len(self.counts)
+
+    def add(self, key: Hashable, weight: int = 1):
+        self._ranked = None
+        if key in self.counts:
+            self.counts[key] += weight
+        elif self.exact or len(self.counts) < self.capacity:
+            self.counts[key] = weight
+        else:
+            floor = self._pop_min()
+            self.counts[key] = floor + weight
+            self.errors[key] = floor
+        if not self.exact:
+            self._push(key)
+
+        if self.exact and len(self.counts) > self.capacity:
+            self._switch_to_approximate()
+
+    def remove(self, key: Hashable, weight: int = 1):
+        """Undo an earlier add; untracked keys are ignored."""
+        if key not in self.counts:
+            return
+        self._ranked = None
+        self.counts[key] -= weight
+        if self.counts[key] <= 0:
+            del self.counts[key]
+            self.errors.pop(key, None)
+        elif not self.exact:
+            self._push(key)
+
+    def top(self, k: int) -> List[Tuple[Hashable, int]]:
+        """The k most frequent (key, count) pairs, largest first."""
+        if self._ranked is None:
+            self._ranked = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)
+        return self._ranked[:max(k, 0)]
+
+    def clear(self):
+        self.counts = {}
+        self.errors = {}
+        self.exact = True
+        self._heap = []
+        self._ranked = None
+
+    def _push(self, key: Hashable):
+        heapq.heappush(self._heap, (self.counts[key], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c, k) for k, c in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> int:
+        while self._heap:
+            count, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                del self.counts[key]
+                self.errors.pop(key, None)
+                return count
+        # Heap ran dry (only after removals); fall back to a scan
+        key = min(self.counts, key=self.counts.get)
+        self.errors.pop(key, None)
+        return self.counts.pop(key)
+
+    def _switch_to_approximate(self):
+        # Kept counts are still exact. A dropped key that reappears restarts
+        # from the smallest kept count, which bounds its true count from above.
+        kept = heapq.nlargest(self.capacity, self.counts.items(), key=lambda kv: kv[1])
+        self.counts = dict(kept)
+        self.errors = {}
+        self.exact = False
+        self._heap = [(c, k) for k, c in self.counts.items()]
+        heapq.heapify(self._heap)
+
+
+class AttackerTracker:
+    """
+    Top source IPs overall (excluding normal traffic) and per attack type.
+    """
+
+    def __init__(self, capacity: int = 10000, ignored_type: str = "Normal"):
+        self.capacity = capacity
+        self.ignored_type = ignored_type
+        self.overall = TopKTracker(capacity)
+        self.by_type: Dict[str, TopKTracker] = {}
+
+    def add(self, ip: str, attack_type: str, count: int = 1):
+        tracker = self.by_type.get(attack_type)
+        if tracker is None:
+            tracker = self.by_type[attack_type] = TopKTracker(self.capacity)
+        tracker.add(ip, count)
+        if attack_type != self.ignored_type:
+            self.overall.add(ip, count)
+
+    def remove(self, ip: str, attack_type: str, count: int = 1):
+        tracker = self.by_type.get(attack_type)
+        if tracker is not None:
+            tracker.remove(ip, count)
+        if attack_type != self.ignored_type:
+            self.overall.remove(ip, count)
+
+    def top(self, k: int, attack_type: Optional[str] = None) -> List[Tuple[str, int]]:
+        if attack_type is None:
+            return self.overall.top(k)
+        tracker = self.by_type.get(attack_type)
+        return tracker.top(k) if tracker is not None else []
+
+    def clear(self):
+        self.overall.clear()
+        self.by_type = {}
+
+    @property
+    def exact(self) -> bool:
+        return self.overall.exact and all(t.exact for t in self.by_type.values())
+
+    def nbytes(self) -> int:
+        # Rough per-entry cost of a dict slot, key string and heap tuple
+        entries = len(self.overall) + sum(len(t) for t in self.by_type.values())
+        return entries * 250
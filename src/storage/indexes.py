@@ -0,0 +1,133 @@
+import numpy as np
+from typing import Dict, Optional
+
+
+class SortedPosting:
+    """
+    Row ids kept in ascending (timestamp, row) order, with a parallel array of
+    timestamps so range and position lookups are binary searches.
+
+    Logs mostly arrive in time order, so the common insert is an in-place
+    append at the tail; out-of-order batches fall back to a merge.
+    """
+
+    def __init__(self, capacity: int = 16):
+        self._rows = np.zeros(capacity, dtype=np.int64)
+        self._ts = np.zeros(capacity, dtype=np.int64)
+        self._size = 0
+        # Bumped whenever existing entries change position
+        self.version = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def rows(self) -> np.ndarray:
+        return self._rows[:self._size]
+
+    @property
+    def ts(self) -> np.ndarray:
+        return self._ts[:self._size]
+
+    def add(self, rows: np.ndarray, ts: np.ndarray):
+        """
+        Insert new rows. Row ids must be larger than any already indexed,
+        which holds because the store only ever appends.
+        """
+        if len(rows) == 0:
+            return
+        order = np.lexsort((rows, ts))
+        rows, ts = rows[order], ts[order]
+
+        if self._size == 0 or ts[0] >= self._ts[self._size - 1]:
+            needed = self._size + len(rows)
+            if needed > len(self._rows):
+                capacity = max(needed, 2 * len(self._rows))
+                self._rows = np.resize(self._rows, capacity)
+                self._ts = np.resize(self._ts, capacity)
+            self._rows[self._size:needed] = rows
+            self._ts[self._size:needed] = ts
+            self._size = needed
+            return
+
+        # Equal timestamps sort new rows last since their ids are larger
+        positions = np.searchsorted(self.ts, ts, side='right')
+        self._rows = np.insert(self.rows, positions, rows)
+        self._ts = np.insert(self.ts, positions, ts)
+        self._size = len(self._rows)
+        self.version += 1
+
+    def trim(self, ts: int, row: int):
+        """Remove every entry up to and including the (ts, row) key."""
+        cut = self.seek(ts, row, after=True)
+        if cut == 0:
+            return
+        # Copy so the memory of the removed head is released
+        self._rows = self.rows[cut:].copy()
+        self._ts = self.ts[cut:].copy()
+        self._size = len(self._rows)
+        self.version += 1
+
+    def seek(self, ts: int, row: Optional[int] = None, after: bool = True) -> int:
+        """
+        Position just past the (ts, row) key, or just before it with
+        after=False. Without a row every entry at `ts` counts as the key.
+        """
+        lo = int(np.searchsorted(self.ts, ts, side='left'))
+        hi = int(np.searchsorted(self.ts, ts, side='right'))
+        if row is None:
+            return hi if after else lo
+        # Rows with equal timestamps are in ascending row order
+        return lo + int(np.searchsorted(self._rows[lo:hi], row, side='right' if after else 'left'))
+
+    def range(self, start_ts: Optional[int] = None, end_ts: Optional[int] = None):
+        """Positions (lo, hi) of the entries with start_ts <= ts <= end_ts."""
+        lo = int(np.searchsorted(self.ts, start_ts, side='left')) if start_ts is not None else 0
+        hi = int(np.searchsorted(self.ts, end_ts, side='right')) if end_ts is not None else self._size
+        return lo, max(lo, hi)
+
+
+class PostingIndex:
+    """
+    Hash index from a column code to the time-ordered rows holding it.
+    """
+
+    def __init__(self):
+        self.postings: Dict[int, SortedPosting] = {}
+
+    def get(self, code: int) -> Optional[SortedPosting]:
+        return self.postings.get(code)
+
+    def add(self, codes: np.ndarray, rows: np.ndarray, ts: np.ndarray):
+        """Group a batch by code and append each group to its posting."""
+        if len(codes) == 0:
+            return
+        order = np.argsort(codes, kind='stable')
+        codes, rows, ts = codes[order], rows[order], ts[order]
+        boundaries = np.flatnonzero(np.diff(codes)) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(codes)]))
+        for start, end in zip(starts, ends):
+            code = int(codes[start])
+            posting = self.postings.get(code)
+            if posting is None:
+                posting = self.postings[code] = SortedPosting()
+            posting.add(rows[start:end], ts[start:end])
+
+    def trim(self, ts: int, row: int):
+        """Remove every entry up to the (ts, row) key; emptied postings go."""
+        for code in list(self.postings):
+            posting = self.postings[code]
+            posting.trim(ts, row)
+            if len(posting) == 0:
+                del self.postings[code]
+
+    def remap(self, codes: np.ndarray):
+        """Re-key postings after the column's dictionary was compacted."""
+        self.postings = {int(codes[code]): posting for code, posting in self.postings.items()}
+
+    def clear(self):
+        self.postings = {}
+
+    def nbytes(self) -> int:
+        return sum(p._rows.nbytes + p._ts.nbytes for p in self.postings.values())
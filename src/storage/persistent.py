@@ -0,0 +1,377 @@
+import json
+import logging
+import os
+import shutil
+import time
+import numpy as np
+from typing import List, Dict, Optional
+from src.schema.events import UnifiedEvent
+from src.storage.event_store import EventStore, CategoricalColumn, StringColumn, StringBlob
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_FORMAT_VERSION = 1
+SEGMENT_PREFIX = "seg-"
+# First live row id and ids of rows evicted out of insertion order
+EVICTED_FILE = "evicted.npz"
+# Dictionary entries introduced by segments deleted by eviction
+DICTIONARY_FILE = "dictionaries.json"
+
+# How dictionary values round-trip through JSON, per categorical column
+_FROM_JSON = {
+    "headers": lambda v: tuple(tuple(pair) for pair in v),
+    "rule_hits": tuple,
+    "rule_matches": lambda v: tuple(tuple(pair) for pair in v),
+}
+
+
+class PersistentEventStore(EventStore):
+    """
+    EventStore backed by append-only columnar segments on disk.
+
+    Every committed batch is written as one segment directory of .npy files:
+    numeric columns as-is, categorical columns as codes plus the dictionary
+    entries they introduced, and strings as a UTF-8 blob with offsets.
+    Segments are written under a temporary name and renamed into place, so
+    a crash never leaves a half-written segment behind. Once there are more
+    than MAX_SEGMENTS, the newest run of similarly sized segments is merged
+    into one, so many small uploads don't leave many small segments.
+
+    On load the segments are memory-mapped: numeric columns and codes are
+    copied into the in-memory columns, URLs and payloads stay on disk and
+    are decoded on access, and the indexes are rebuilt from the columns.
+
+    Each segment records the id of its first row, so ids survive restarts.
+    Retention eviction records the first live row id (and any rows evicted
+    out of insertion order) in EVICTED_FILE and deletes segments that hold
+    no live rows, keeping the dictionary entries they introduced in
+    DICTIONARY_FILE; nothing else is rewritten. A segment written to replace
+    others lists them, and loading finishes that replacement if a crash
+    interrupted it.
+    """
+
+    # Segment count above which the newest segments are merged
+    MAX_SEGMENTS = 16
+
+    def __init__(
+        self,
+        path: str,
+        top_ip_capacity: int = 10000,
+        max_events: int = 0,
+        max_bytes: int = 0,
+        max_age_seconds: int = 0
+    ):
+        super().__init__(top_ip_capacity, max_events, max_bytes, max_age_seconds)
+        self.path = path
+        self.segments: List[str] = []
+        # Segment name -> (first row id, row count, dictionary sizes before it, bytes on disk)
+        self._extents: Dict[str, tuple] = {}
+        # Dictionary entries already written, per categorical column
+        self._persisted: Dict[str, int] = {}
+        self.loaded = False
+
+    def load(self):
+        """Rebuild the store from the segments on disk."""
+        with self.lock:
+            self._load()
+            # Limits may have been lowered since the segments were written
+            self.enforce_retention()
+
+    def _load(self):
+        start = time.perf_counter()
+        # Reset memory only; the segments are what we're loading
+        EventStore._clear(self)
+        self.segments = []
+        self._extents = {}
+        self._persisted = {}
+        os.makedirs(self.path, exist_ok=True)
+        self._remove_partial_segments()
+        names = sorted(
+            n for n in os.listdir(self.path)
+            if n.startswith(SEGMENT_PREFIX) and not n.endswith(".tmp"))
+        metas = {name: self._read_meta(name) for name in names}
+        replaced = set()
+        for name in names:
+            replaced.update(metas[name]["replaces"])
+        for name in replaced & set(names):
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+        names = [name for name in names if name not in replaced]
+
+        base, dead = self._read_evicted()
+        for name in names:
+            meta = metas[name]
+            first = meta["first_row"]
+            if first + meta["rows"] <= base:
+                # Every row of it was evicted before the restart
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+                continue
+            if not self.segments:
+                self.base = first
+                self._read_dictionary_prefix(meta["dictionary_start"])
+            self._read_segment(name, meta)
+        if self.base < base:
+            # `end` depends on event_id, which is dropped along the way
+            count = min(base, self.end) - self.base
+            for column in list(self.columns().values()) + [self._alive]:
+                column.drop(count)
+        if not self.segments or self.base < base:
+            self.base = base
+        dead = dead[(dead >= self.base) & (dead < self.end)]
+        self._alive.values[dead - self.base] = False
+        self._index_rows(np.flatnonzero(self._alive.values) + self.base)
+        self.loaded = True
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info("Loaded %d events from %d segments in %s (%.1fms)",
+                    len(self), len(self.segments), self.path, elapsed)
+
+    def _append(self, events: List[UnifiedEvent], rule_matches: Optional[List[Dict[str, list]]]):
+        if not self.loaded:
+            # New segments continue the dictionaries of the existing ones
+            self._load()
+        start = self.end
+        self._extend_columns(events, rule_matches)
+        try:
+            self._write_segment(start, self.end)
+        except Exception:
+            # Keep memory and disk in step: the batch is rejected as a whole
+            self._truncate(start)
+            raise
+        self._index_rows(np.arange(start, self.end, dtype=np.int64))
+        try:
+            self._compact_segments()
+        except Exception:
+            # The batch is already on disk; merging is retried after the next one
+            logger.exception("Segment compaction failed in %s", self.path)
+
+    def _clear(self):
+        super()._clear()
+        if os.path.isdir(self.path):
+            for name in os.listdir(self.path):
+                if name.startswith((SEGMENT_PREFIX, EVICTED_FILE, DICTIONARY_FILE)):
+                    path = os.path.join(self.path, name)
+                    if os.path.isdir(path):
+                        shutil.rmtree(path, ignore_errors=True)
+                    else:
+                        os.remove(path)
+        self.segments = []
+        self._extents = {}
+        self._persisted = {}
+        self.loaded = True
+
+    # --- Retention ---
+
+    def _evict(self, count: int):
+        super()._evict(count)
+        self._write_evicted()
+        expired = []
+        for name in self.segments:
+            first, rows = self._extents[name][:2]
+            if first + rows > self.base:
+                break
+            expired.append(name)
+        if not expired:
+            return
+        # Later segments' codes still refer to entries the expired ones introduced
+        if len(expired) < len(self.segments):
+            self._write_dictionary_prefix(self._extents[self.segments[len(expired)]][2])
+        else:
+            self._write_dictionary_prefix(self._persisted)
+        for name in expired:
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+            self.segments.remove(name)
+            del self._extents[name]
+
+    def _compact_dictionaries(self) -> bool:
+        if not super()._compact_dictionaries():
+            return False
+        # Codes on disk refer to the old dictionaries
+        self._rewrite_segments()
+        return True
+
+    def _write_evicted(self):
+        dead = np.flatnonzero(~self._alive.values) + self.base
+        tmp_path = os.path.join(self.path, EVICTED_FILE + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, base=np.int64(self.base), dead=dead.astype(np.int64))
+        os.replace(tmp_path, os.path.join(self.path, EVICTED_FILE))
+
+    def _write_dictionary_prefix(self, sizes: Dict[str, int]):
+        prefix = {
+            field: column.dictionary[:sizes.get(field, 0)]
+            for field, column in self.columns().items() if isinstance(column, CategoricalColumn)
+        }
+        tmp_path = os.path.join(self.path, DICTIONARY_FILE + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(prefix, f)
+        os.replace(tmp_path, os.path.join(self.path, DICTIONARY_FILE))
+
+    def _read_dictionary_prefix(self, sizes: Dict[str, int]):
+        """Encode the entries the first remaining segment's codes start after."""
+        if not any(sizes.values()):
+            return
+        with open(os.path.join(self.path, DICTIONARY_FILE), 'r') as f:
+            prefix = json.load(f)
+        for field, size in sizes.items():
+            column = getattr(self, field)
+            convert = _FROM_JSON.get(field)
+            for value in prefix[field][:size]:
+                column.encode(convert(value) if convert else value)
+
+    def _read_evicted(self):
+        path = os.path.join(self.path, EVICTED_FILE)
+        if not os.path.exists(path):
+            return 0, np.zeros(0, dtype=np.int64)
+        with np.load(path) as state:
+            return int(state["base"]), state["dead"]
+
+    # --- Segment I/O ---
+
+    def _compact_segments(self):
+        """Merge the newest segments once there are more than MAX_SEGMENTS."""
+        if len(self.segments) <= self.MAX_SEGMENTS:
+            return
+        # Extend the run while the next older segment is no larger than the
+        # run so far, so each row is rewritten O(log n) times
+        run = self.segments[-2:]
+        rows = sum(self._extents[name][1] for name in run)
+        for name in reversed(self.segments[:-2]):
+            if self._extents[name][1] > rows:
+                break
+            run.insert(0, name)
+            rows += self._extents[name][1]
+        self._merge_segments(run, self._extents[run[0]][2])
+        logger.info("Merged %d segments (%d rows) in %s", len(run), rows, self.path)
+
+    def _rewrite_segments(self):
+        """Replace every segment with one segment of the rows in memory."""
+        self._merge_segments(list(self.segments), {})
+
+    def _merge_segments(self, names: List[str], dictionary_start: Dict[str, int]):
+        """
+        Replace the newest segments `names` with one segment of their rows
+        in memory, holding dictionary entries from `dictionary_start` on.
+        """
+        start = max(self._extents[names[0]][0], self.base) if names else self.base
+        persisted = self._persisted
+        self._persisted = dict(dictionary_start)
+        try:
+            self._write_segment(start, self.end, replaces=names)
+        except Exception:
+            self._persisted = persisted
+            raise
+        for name in names:
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+            self.segments.remove(name)
+            del self._extents[name]
+        # Serve strings from the new segment instead of in-memory lists
+        seg_dir = os.path.join(self.path, self.segments[-1])
+        for field, column in self.columns().items():
+            if isinstance(column, StringColumn):
+                column.truncate(start - self.base)
+                column.extend_blob(_load_strings(seg_dir, field))
+
+    def _write_segment(self, start: int, end: int, replaces: List[str] = ()):
+        """Write rows start..end (ids) as a new segment."""
+        os.makedirs(self.path, exist_ok=True)
+        number = int(self.segments[-1][len(SEGMENT_PREFIX):]) + 1 if self.segments else 1
+        name = f"{SEGMENT_PREFIX}{number:08d}"
+        tmp_dir = os.path.join(self.path, name + ".tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        lo, hi = start - self.base, end - self.base
+        dictionary_start = dict(self._persisted)
+        dictionaries = {}
+        for field, column in self.columns().items():
+            if isinstance(column, CategoricalColumn):
+                np.save(os.path.join(tmp_dir, f"{field}.npy"), column.codes.values[lo:hi])
+                done = self._persisted.get(field, 0)
+                dictionaries[field] = column.dictionary[done:]
+            elif isinstance(column, StringColumn):
+                blob, offsets, nulls = StringBlob.pack(column.slice(lo, hi))
+                np.save(os.path.join(tmp_dir, f"{field}.blob.npy"), blob)
+                np.save(os.path.join(tmp_dir, f"{field}.offsets.npy"), offsets)
+                np.save(os.path.join(tmp_dir, f"{field}.nulls.npy"), nulls)
+            else:
+                np.save(os.path.join(tmp_dir, f"{field}.npy"), column.values[lo:hi])
+
+        with open(os.path.join(tmp_dir, "segment.json"), 'w') as f:
+            json.dump({
+                "format_version": SEGMENT_FORMAT_VERSION,
+                "first_row": start,
+                "rows": end - start,
+                "replaces": list(replaces),
+                "dictionary_start": dictionary_start,
+                "dictionaries": dictionaries,
+            }, f)
+        size = _directory_bytes(tmp_dir)
+        os.rename(tmp_dir, os.path.join(self.path, name))
+
+        self.segments.append(name)
+        self._extents[name] = (start, end - start, dictionary_start, size)
+        for field, values in dictionaries.items():
+            self._persisted[field] = self._persisted.get(field, 0) + len(values)
+
+    def _read_meta(self, name: str) -> dict:
+        seg_dir = os.path.join(self.path, name)
+        with open(os.path.join(seg_dir, "segment.json"), 'r') as f:
+            meta = json.load(f)
+        if meta.get("format_version") != SEGMENT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported segment format in {seg_dir}")
+        return meta
+
+    def _read_segment(self, name: str, meta: dict):
+        seg_dir = os.path.join(self.path, name)
+        first = self.end
+        dictionary_start = {
+            field: len(column.dictionary)
+            for field, column in self.columns().items() if isinstance(column, CategoricalColumn)
+        }
+
+        for field, column in self.columns().items():
+            if isinstance(column, CategoricalColumn):
+                convert = _FROM_JSON.get(field)
+                for value in meta["dictionaries"].get(field, []):
+                    column.encode(convert(value) if convert else value)
+                column.codes.extend(_load_array(seg_dir, f"{field}.npy"))
+            elif isinstance(column, StringColumn):
+                column.extend_blob(_load_strings(seg_dir, field))
+            else:
+                column.extend(_load_array(seg_dir, f"{field}.npy"))
+        self._alive.extend(np.ones(meta["rows"], dtype=np.bool_))
+
+        for field, column in self.columns().items():
+            if isinstance(column, CategoricalColumn):
+                self._persisted[field] = len(column.dictionary)
+        self.segments.append(name)
+        self._extents[name] = (first, meta["rows"], dictionary_start, _directory_bytes(seg_dir))
+
+    def _remove_partial_segments(self):
+        for name in os.listdir(self.path):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(".tmp"):
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+    def memory_stats(self) -> dict:
+        stats = super().memory_stats()
+        stats["segments"] = len(self.segments)
+        stats["disk_bytes"] = self.disk_bytes()
+        return stats
+
+    def disk_bytes(self) -> int:
+        # Sizes are recorded when segments are written or loaded
+        return sum(extent[3] for extent in self._extents.values())
+
+
+def _directory_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def _load_array(seg_dir: str, file_name: str) -> np.ndarray:
+    return np.load(os.path.join(seg_dir, file_name), mmap_mode='r')
+
+
+def _load_strings(seg_dir: str, field: str) -> StringBlob:
+    return StringBlob(
+        _load_array(seg_dir, f"{field}.blob.npy"),
+        _load_array(seg_dir, f"{field}.offsets.npy"),
+        _load_array(seg_dir, f"{field}.nulls.npy"))
@@ -0,0 +1,68 @@
+import numpy as np
+from typing import Dict, List, Optional
+
+MINUTE_US = 60 * 10**6
+
+GRANULARITIES = {
+    "minute": MINUTE_US,
+    "hour": 60 * MINUTE_US,
+    "day": 24 * 60 * MINUTE_US,
+}
+
+
+class TimelineRollup:
+    """
+    Success/attempt counts pre-aggregated at minute, hour and day resolution.
+
+    Counts are updated per ingested batch, so reading a timeline costs the
+    number of buckets returned rather than the number of stored events.
+    """
+
+    def __init__(self):
+        # granularity -> {bucket start (us): [success, attempt]}
+        self.levels: Dict[str, Dict[int, List[int]]] = {g: {} for g in GRANULARITIES}
+
+    def add(self, ts: np.ndarray, success: np.ndarray):
+        self._apply(ts, success, 1)
+
+    def remove(self, ts: np.ndarray, success: np.ndarray):
+        self._apply(ts, success, -1)
+
+    def _apply(self, ts: np.ndarray, success: np.ndarray, sign: int):
+        if len(ts) == 0:
+            return
+        success = success.astype(np.int64)
+        for granularity, width in GRANULARITIES.items():
+            level = self.levels[granularity]
+            keys, inverse = np.unique(ts // width * width, return_inverse=True)
+            total = np.bincount(inverse, minlength=len(keys))
+            hits = np.bincount(inverse, weights=success, minlength=len(keys)).astype(np.int64)
+            for key, s, t in zip(keys.tolist(), hits.tolist(), total.tolist()):
+                counts = level.setdefault(key, [0, 0])
+                counts[0] += sign * s
+                counts[1] += sign * (t - s)
+                if counts[0] <= 0 and counts[1] <= 0:
+                    del level[key]
+
+    def series(
+        self,
+        granularity: str = "hour",
+        start_us: Optional[int] = None,
+        end_us: Optional[int] = None
+    ) -> List[tuple]:
+        """(bucket start, success, attempt) tuples in time order."""
+        width = GRANULARITIES[granularity]
+        level = self.levels[granularity]
+        low = start_us // width * width if start_us is not None else None
+        return [
+            (key, level[key][0], level[key][1])
+            for key in sorted(level)
+            if (low is None or key >= low) and (end_us is None or key <= end_us)
+        ]
+
+    def clear(self):
+        self.levels = {g: {} for g in GRANULARITIES}
+
+    def nbytes(self) -> int:
+        # Rough per-entry cost of a dict slot plus its two-int list
+        return sum(len(level) for level in self.levels.values()) * 200
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Tests never touch the checked-in users.db
+os.environ.setdefault(
+    "USERS_DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'users.db')}")
@@ -1,3 +1,4 @@
+import pytest
 from fastapi.testclient import TestClient
 from src.api.main import app
 
@@ -29,3 +30,342 @@ def test_explain_endpoint():
         resp = c.get(f"/explain/{target_id}")
         assert resp.status_code == 200
         assert "confidence" in resp.json()
+
+@pytest.fixture
+def uploaded(tmp_path, monkeypatch):
+    """A client over a fresh store holding 40 synthetic events, uploaded as CSV in chunks of 15."""
+    from src.api.main import get_current_user
+    from src import config
+    from src.generation.synthetic import SyntheticLogGenerator
+    import pandas as pd
+
+    events = SyntheticLogGenerator(seed=7).generate_events(40)
+    csv_path = tmp_path / "upload.csv"
+    pd.DataFrame([e.model_dump() for e in events]).to_csv(csv_path, index=False)
+
+    monkeypatch.setattr(config, "UPLOAD_CHUNK_SIZE", 15)
+    app.dependency_overrides[get_current_user] = lambda: type("U", (), {"username": "tester"})()
+    try:
+        with TestClient(app) as c:
+            with open(csv_path, "rb") as f:
+                resp = c.post("/upload/logs?clear_existing=true", files={"file": ("upload.csv", f, "text/csv")})
+            assert resp.status_code == 200
+            yield c, events, resp.json()
+    finally:
+        app.dependency_overrides.clear()
+
+def test_upload_and_query(uploaded):
+    c, events, result = uploaded
+    assert result["count"] == 40
+    assert [chunk["count"] for chunk in result["chunks"]] == [15, 15, 10]
+
+    page = c.get("/events", params={"limit": 10}).json()
+    assert len(page) == 10
+    times = [e["timestamp"] for e in page]
+    assert times == sorted(times, reverse=True)
+
+    # Success is recomputed from the predicted attack type
+    for e in c.get("/events", params={"limit": 40}).json():
+        expected = e["status_code"] == 200 and (
+            e["attack_type"] in ("SQLi", "SSRF")
+            or (e["attack_type"] == "Traversal" and e["response_size"] > 100))
+        assert e["is_successful"] == expected
+
+    ip = events[0].source_ip
+    story = c.get(f"/storyline/{ip}").json()
+    assert len(story) == sum(1 for e in events if e.source_ip == ip)
+
+    c.delete("/events")
+    assert c.get("/events").json() == []
+
+def test_cursor_pagination(uploaded):
+    """Cursor pages cover every event exactly once, in order."""
+    c, events, _ = uploaded
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 7, **({"cursor": cursor} if cursor else {})}
+        resp = c.get("/events", params=params)
+        seen += resp.json()
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert [e["event_id"] for e in seen] == [e["event_id"] for e in c.get("/events").json()]
+
+    ip = events[0].source_ip
+    story = c.get(f"/storyline/{ip}").json()
+    paged = c.get(f"/storyline/{ip}", params={"limit": 1})
+    assert paged.json() == story[:1]
+    if len(story) > 1:
+        rest = c.get(f"/storyline/{ip}", params={"cursor": paged.headers["X-Next-Cursor"]}).json()
+        assert rest == story[1:]
+    assert c.get("/events", params={"cursor": "not a cursor"}).status_code == 400
+
+def test_ndjson_stream(uploaded, monkeypatch):
+    """NDJSON streams the same events one per line, across several pages."""
+    import json
+    from src.api import main
+
+    c, events, _ = uploaded
+    monkeypatch.setattr(main, "STREAM_PAGE_SIZE", 6)
+    resp = c.get("/events", params={"limit": 40, "format": "ndjson"})
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in resp.text.splitlines()] == c.get("/events", params={"limit": 40}).json()
+    ip = events[0].source_ip
+    resp = c.get(f"/storyline/{ip}", params={"format": "ndjson"})
+    assert [json.loads(line) for line in resp.text.splitlines()] == c.get(f"/storyline/{ip}").json()
+    assert c.get("/events", params={"format": "xml"}).status_code == 400
+
+def test_storyline_filters(uploaded):
+    c, events, _ = uploaded
+    ip = events[0].source_ip
+    story = c.get(f"/storyline/{ip}").json()
+    middle = story[len(story) // 2]
+    windowed = c.get(f"/storyline/{ip}", params={"start": middle["timestamp"], "end": middle["timestamp"]}).json()
+    assert middle in windowed and all(e["timestamp"] == middle["timestamp"] for e in windowed)
+    typed = c.get(f"/storyline/{ip}", params={"attack_type": middle["attack_type"]}).json()
+    assert typed == [e for e in story if e["attack_type"] == middle["attack_type"]]
+
+def test_timeline_stats(uploaded):
+    c, _, _ = uploaded
+    timeline = c.get("/stats/timeline").json()
+    assert sum(b["success"] + b["attempt"] for b in timeline) == 40
+    daily = c.get("/stats/timeline", params={"granularity": "day"}).json()
+    assert sum(b["success"] + b["attempt"] for b in daily) == 40
+    assert c.get("/stats/timeline", params={"granularity": "week"}).status_code == 400
+
+def test_top_ips_by_attack_type(uploaded):
+    c, _, _ = uploaded
+    breakdown = c.get("/stats/top-ips", params={"by_attack_type": True}).json()
+    assert "Normal" not in breakdown
+    for name, top in breakdown.items():
+        assert c.get("/stats/top-ips", params={"attack_type": name}).json() == top
+
+def test_explain_uploaded_events(uploaded):
+    c, _, _ = uploaded
+    page = c.get("/events", params={"limit": 10}).json()
+    explain = c.get(f"/explain/{page[0]['event_id']}")
+    assert explain.status_code == 200
+    assert explain.json()["confidence"] == page[0]["confidence"]
+
+    attacks = c.get("/events", params={"limit": 1000}).json()
+    ruled = next(e for e in attacks if e["rule_hits"])
+    hits = c.get(f"/explain/{ruled['event_id']}").json()["rule_hits"]
+    assert sorted(n for names in hits.values() for n in names) == sorted(ruled["rule_hits"])
+    assert c.get("/explain/no-such-event").status_code == 404
+
+def test_unreadable_csv_is_a_client_error():
+    from src.api.main import get_current_user
+
+    app.dependency_overrides[get_current_user] = lambda: type("U", (), {"username": "tester"})()
+    try:
+        with TestClient(app) as c:
+            for body, detail in ((b"", "empty"),
+                                 (b"source_ip,url\n1.2.3.4,/\n", "timestamp"),
+                                 (b'timestamp,source_ip,url\n"2024-01-01,1.2.3.4,/\n', "Malformed"),
+                                 (b"timestamp,source_ip,url\nnot a time,1.2.3.4,/\n", "Invalid file")):
+                resp = c.post("/upload/logs", files={"file": ("bad.csv", body, "text/csv")})
+                assert resp.status_code == 400, resp.json()
+                assert detail in resp.json()["detail"]
+    finally:
+        app.dependency_overrides.clear()
+
+def test_ndjson_stream_with_duplicate_ids(tmp_path, monkeypatch):
+    """Re-uploaded files repeat event ids; streamed pages still match the JSON body."""
+    import json
+    from src.api import main
+    from src.api.main import get_current_user
+    from src.generation.synthetic import SyntheticLogGenerator
+
+    events = SyntheticLogGenerator(seed=9).generate_events(60)
+    for e in events:
+        e.source_ip = "10.9.9.9"
+    body = "\n".join(e.model_dump_json() for e in events)
+
+    monkeypatch.setattr(main, "STREAM_PAGE_SIZE", 5)
+    app.dependency_overrides[get_current_user] = lambda: type("U", (), {"username": "tester"})()
+    try:
+        with TestClient(app) as c:
+            for clear in ("true", "false"):
+                resp = c.post(f"/upload/logs?clear_existing={clear}",
+                              files={"file": ("dup.jsonl", body, "application/x-ndjson")})
+                assert resp.status_code == 200
+            story = c.get("/storyline/10.9.9.9").json()
+            assert len(story) == 120
+            resp = c.get("/storyline/10.9.9.9", params={"format": "ndjson"})
+            assert [json.loads(line) for line in resp.text.splitlines()] == story
+            resp = c.get("/events", params={"limit": 120, "format": "ndjson"})
+            assert len(resp.text.splitlines()) == 120
+    finally:
+        app.dependency_overrides.clear()
+
+def test_background_upload_job(tmp_path):
+    import time
+    from src.api.main import get_current_user, PIPELINE
+    from src.generation.synthetic import SyntheticLogGenerator
+
+    events = SyntheticLogGenerator(seed=8).generate_events(25)
+    body = "\n".join(e.model_dump_json() for e in events)
+    # Earlier tests warm the prediction cache; this one times the classify stages
+    PIPELINE.cache.clear()
+
+    app.dependency_overrides[get_current_user] = lambda: type("U", (), {"username": "tester"})()
+    try:
+        with TestClient(app) as c:
+            resp = c.post("/upload/logs?clear_existing=true&background=true",
+                          files={"file": ("events.jsonl", body.encode(), "application/x-ndjson")})
+            assert resp.status_code == 200
+            job_id = resp.json()["job_id"]
+
+            for _ in range(100):
+                status = c.get(f"/jobs/{job_id}").json()
+                if status["status"] not in ("queued", "running"):
+                    break
+                time.sleep(0.05)
+            assert status["status"] == "completed"
+            assert status["rows_committed"] == 25
+            assert status["result"]["count"] == 25
+            assert any(j["job_id"] == job_id for j in c.get("/jobs").json())
+            assert len(c.get("/events", params={"limit": 100}).json()) == 25
+            assert c.get("/jobs/unknown").status_code == 404
+
+            # Per-stage timings on the job and in the upload history
+            stages = status["timings"]["stages"]
+            for name in ("copy", "parse", "classify", "classify.rules", "success", "commit"):
+                assert name in stages
+            assert stages["parse"]["rows"] == 25 and stages["commit"]["rows"] == 25
+            history = c.get("/uploads/history").json()
+            assert history[0]["job_id"] == job_id and history[0]["timings"]["stages"].keys() == stages.keys()
+
+            # Sampling profiler on demand
+            resp = c.post("/upload/logs?clear_existing=true&profile=true",
+                          files={"file": ("events.jsonl", body.encode(), "application/x-ndjson")})
+            profile = resp.json()["profile"]
+            assert profile["samples"] >= 0 and isinstance(profile["cumulative"], list)
+    finally:
+        app.dependency_overrides.clear()
+
+def test_stage_memory_is_per_stage():
+    """A stage's memory is what it used, not the process high-water mark."""
+    import numpy as np
+    import pytest
+    from src.api.profiling import StageTimer, current_rss_mb
+
+    if current_rss_mb() is None:
+        pytest.skip("RSS sampling needs /proc")
+    timer = StageTimer()
+    with timer.stage("allocate"):
+        block = np.ones(64 * 1024 * 1024, dtype=np.uint8)
+    del block
+    with timer.stage("quiet"):
+        sum(range(1000))
+    timer.add("external", 0.1)
+    stages = timer.report()["stages"]
+    assert stages["allocate"]["rss_growth_mb"] >= 48
+    assert stages["quiet"]["rss_growth_mb"] < 16
+    assert stages["external"]["peak_rss_mb"] is None
+
+def test_job_cancellation():
+    import threading
+    from src.api.jobs import JobManager, UploadJob, JobCancelled
+
+    manager = JobManager(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    def run(job):
+        started.set()
+        release.wait(5)
+        job.check_cancelled()
+        return {"count": 1}
+
+    running = manager.submit(UploadJob("a.csv"), run)
+    queued = manager.submit(UploadJob("b.csv"), run)
+    assert started.wait(5)
+    manager.cancel(queued.id)
+    manager.cancel(running.id)
+    release.set()
+    manager.shutdown()
+
+    assert queued.status == "cancelled"
+    assert running.status == "cancelled"
+    assert isinstance(running.future.exception(), JobCancelled)
+
+def test_job_history_keeps_unfinished_jobs():
+    import threading
+    from src.api.jobs import JobManager, UploadJob
+
+    manager = JobManager(max_workers=1, history=2)
+    release = threading.Event()
+    jobs = [manager.submit(UploadJob(f"{i}.csv"), lambda job: release.wait(5) and {}) for i in range(4)]
+    # Over the limit, but nothing has finished yet
+    assert [job.id for job in manager.list()] == [job.id for job in reversed(jobs)]
+    release.set()
+    for job in jobs:
+        job.future.result(5)
+    manager.shutdown()
+    assert [job.id for job in manager.list()] == [jobs[3].id, jobs[2].id]
+    assert manager.get(jobs[0].id) is None
+
+def test_startup_fails_on_missing_artifact(tmp_path, monkeypatch):
+    import pytest
+    from src import config
+    from src.api.main import load_model_artifact
+    monkeypatch.setattr(config, "MODEL_ARTIFACT_PATH", str(tmp_path / "nope"))
+    with pytest.raises(RuntimeError, match="Failed to load model artifact"):
+        load_model_artifact()
+
+def test_authenticated_user_cache():
+    """Repeat requests with one token skip the user query until the row changes."""
+    from sqlalchemy import event
+    from src.api.main import USER_CACHE
+    from src.api.models import engine, SessionLocal, User
+
+    queries = []
+    def count(conn, cursor, statement, *args):
+        if "FROM users" in statement:
+            queries.append(statement)
+
+    with TestClient(app) as c:
+        assert c.post("/auth/signup", json={"username": "cache-user", "password": "pw"}).status_code == 200
+        token = c.post("/auth/login", data={"username": "cache-user", "password": "pw"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            for _ in range(5):
+                me = c.get("/auth/me", headers=headers)
+                assert me.status_code == 200 and me.json()["role"] == "analyst"
+            assert len(queries) == 1
+
+            # A role change through the ORM invalidates the cached snapshot
+            db = SessionLocal()
+            db.query(User).filter(User.username == "cache-user").one().role = "admin"
+            db.commit()
+            db.close()
+            assert c.get("/auth/me", headers=headers).json()["role"] == "admin"
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+
+        assert c.get("/auth/me", headers={"Authorization": "Bearer nope"}).status_code == 401
+        USER_CACHE.clear()
+
+def test_metrics_endpoint():
+    """Requests show up per route template in the Prometheus output."""
+    from src.api.metrics import Histogram
+
+    h = Histogram(buckets=(0.1, 0.2, 0.4))
+    for value in [0.05] * 50 + [0.15] * 45 + [0.3] * 5:
+        h.observe(value)
+    assert h.quantile(0.5) == 0.1
+    assert 0.1 < h.quantile(0.95) <= 0.2
+    assert 0.2 < h.quantile(0.99) <= 0.4
+
+    with TestClient(app) as c:
+        c.get("/events")
+        c.get("/explain/does-not-exist")
+        text = c.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/events",status="200"}' in text
+    assert 'http_requests_total{method="GET",route="/explain/{event_id}",status="404"}' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/events",le="+Inf"}' in text
+    assert 'http_request_duration_quantile_seconds{method="GET",route="/events",quantile="0.99"}' in text
+    assert "http_requests_in_flight 1" in text  # the /metrics request itself
+    assert "event_store_events " in text
@@ -67,3 +67,269 @@ def test_ingestion_json(tmp_path):
     loaded_events = DataLoader.load_json(str(json_path))
     assert len(loaded_events) == 5
     assert loaded_events[0].event_id == events[0].event_id
+
+def test_rule_detector_single_scan(tmp_path):
+    """Every matching rule is reported, including ones starting at the same position."""
+    from src.models.rules import RuleBasedDetector
+    detector = RuleBasedDetector()
+    hits = detector.analyze_text("/download?file=../../etc/passwd&file=x", "' or 1=1 -- <SCRIPT>")
+    assert hits == {
+        "Traversal": ["Unix Traversal", "Sensitive File Access"],
+        "SQLi": ["Classic SQLi", "SQL Comment"],
+        "XSS": ["Script Tag"],
+        "HPP": ["Duplicate Parameters"],
+    }
+
+    import json
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(json.dumps({"Probe": [["admin", "Admin Path"], ["admin/config", "Admin Config"]]}))
+    custom = RuleBasedDetector.from_file(str(rules_path))
+    events = SyntheticLogGenerator(seed=3).generate_events(3)
+    events[0].url = "/ADMIN/config"
+    assert custom.analyze_many(events)[0] == {"Probe": ["Admin Path", "Admin Config"]}
+
+def test_pipeline_batches_ml_inference():
+    """Rule misses are scored in batches using the training feature text."""
+    from src.models.baseline import TFIDFClassifier
+    from src.models.rules import RuleBasedDetector
+    from src.models.pipeline import ClassificationPipeline
+
+    gen = SyntheticLogGenerator(seed=11)
+    model = TFIDFClassifier()
+    model.train(gen.generate_events(200))
+
+    calls = []
+    predict_proba = model.predict_proba
+    def spy(texts):
+        calls.append(list(texts))
+        return predict_proba(texts)
+    model.predict_proba = spy
+
+    events = gen.generate_events(50)
+    for e in events:
+        e.confidence = 0.0
+    pipeline = ClassificationPipeline(RuleBasedDetector(), model, batch_size=8)
+    matches = pipeline.classify(events)
+
+    misses = [e for e, m in zip(events, matches) if not m]
+    # Repeated requests are scored once
+    unique = {f"{e.method} {e.url} {e.payload or ''}" for e in misses}
+    assert sum(len(c) for c in calls) == len(unique)
+    assert len(calls) == -(-len(unique) // 8)
+    assert calls[0][0] == f"{misses[0].method} {misses[0].url} {misses[0].payload or ''}"
+    assert all(e.attack_type in model.classes for e in misses)
+    assert all(e.confidence == 1.0 for e, m in zip(events, matches) if m)
+
+def test_prediction_cache():
+    """Repeated texts hit the LRU cache until the model version changes."""
+    from src.models.baseline import TFIDFClassifier
+    from src.models.rules import RuleBasedDetector
+    from src.models.pipeline import ClassificationPipeline
+    from src.models.cache import PredictionCache
+
+    cache = PredictionCache(max_size=2)
+    cache.check_version("v1")
+    for key in ("a", "b", "c"):
+        cache.put(key, key)
+    assert cache.get("a") is None and cache.get("c") == "c"
+    assert cache.stats()["evictions"] == 1
+    cache.check_version("v2")
+    assert len(cache) == 0 and cache.stats()["invalidations"] == 1
+
+    gen = SyntheticLogGenerator(seed=14)
+    model = TFIDFClassifier()
+    model.train(gen.generate_events(200))
+    pipeline = ClassificationPipeline(RuleBasedDetector(), model, cache_size=100)
+    events = gen.generate_events(30)
+    for e in events:
+        e.confidence = 0.0
+    copies = [e.model_copy(deep=True) for e in events]
+
+    first = pipeline.classify(events)
+    misses = pipeline.cache.misses
+    assert pipeline.classify(copies) == first
+    assert [e.model_dump() for e in copies] == [e.model_dump() for e in events]
+    assert pipeline.cache.misses == misses and pipeline.cache.hits >= len(copies)
+
+    # Pre-labeled events keep their label even on a cache hit
+    labeled = events[0].model_copy(update={"attack_type": "Manual", "confidence": 0.9})
+    pipeline.classify([labeled])
+    assert labeled.attack_type == "Manual"
+
+    # Pre-labeled texts skip the model, and get a label once one is needed
+    fresh = gen.generate_events(20)
+    for i, e in enumerate(fresh):
+        e.url = f"/prelabeled/{i}"
+        e.confidence = 0.99
+    stats = {}
+    pipeline.classify([e.model_copy(deep=True) for e in fresh], stats)
+    assert stats.get("model_rows", 0) == 0
+    unlabeled = fresh[0].model_copy(update={"confidence": 0.0})
+    pipeline.classify([unlabeled])
+    assert unlabeled.confidence > 0.0
+
+    # Method case reaches the model, so it is part of the key
+    assert PredictionCache.key("get", "/x", None) != PredictionCache.key("GET", "/x", None)
+
+    model.train(gen.generate_events(200))
+    pipeline.classify(events[:1])
+    assert len(pipeline.cache) == 1
+
+def test_success_batch_matches_predict():
+    """Column-wise success labeling agrees with the per-event rules."""
+    from src.models.success_classifier import SuccessClassifier
+
+    clf = SuccessClassifier()
+    events, types = [], []
+    for attack_type in ["Normal", "SQLi", "XSS", "Traversal", "SSRF", "Unknown"]:
+        for code in [200, 403, 404, 500]:
+            for size in [0, 100, 101, 5000]:
+                events.append(UnifiedEvent(
+                    event_id=f"e{len(events)}", timestamp="2023-01-01T12:00:00", source_ip="1.1.1.1",
+                    method="GET", url="/", status_code=code, response_size=size, attack_type="Normal"
+                ))
+                types.append(attack_type)
+    expected = [clf.predict(e, t) for e, t in zip(events, types)]
+    assert clf.batch_predict(events, types) == expected
+    assert any(expected) and not all(expected)
+
+def test_ingestion_csv_defaults(tmp_path):
+    """Missing and malformed cells get the same defaults as before."""
+    csv_path = tmp_path / "partial.csv"
+    csv_path.write_text(
+        "timestamp,source_ip,url,status_code,response_size,headers,rule_hits,is_successful,confidence,method,event_id\n"
+        "2026-01-07 10:00:00,1.1.1.1,/a,abc,12.7,\"{'Host': 'x'}\",bad,true,,,\n"
+        "2026-01-07 10:05:00,1.1.1.2,/b,,,,\"['Script Tag']\",,0.5,POST,id2\n"
+    )
+    first, second = DataLoader.load_csv(str(csv_path))
+
+    assert first.event_id and first.method == "GET" and first.user_agent == "Unknown"
+    assert (first.status_code, first.response_size) == (200, 12)
+    assert first.headers == {"Host": "x"} and first.rule_hits == []
+    assert first.is_successful is True and first.confidence == 0.0
+    assert first.attack_type == "Analyzing..." and first.payload is None
+
+    assert second.event_id == "id2" and second.method == "POST"
+    assert (second.status_code, second.response_size) == (200, 0)
+    assert second.headers == {} and second.rule_hits == ["Script Tag"]
+    assert second.is_successful is False and second.confidence == 0.5
+
+def test_ingestion_streaming_json(tmp_path, monkeypatch):
+    """JSON Lines and JSON arrays stream in chunks and skip malformed records."""
+    import json
+    import src.ingestion.loader as loader
+    events = SyntheticLogGenerator(seed=9).generate_events(7)
+    records = [e.model_dump(mode='json') for e in events]
+
+    jsonl_path = tmp_path / "events.jsonl"
+    lines = [json.dumps(r) for r in records]
+    lines.insert(3, "{not json")
+    lines.insert(5, json.dumps({"event_id": "missing-fields"}))
+    jsonl_path.write_text("\n".join(lines) + "\n\n")
+    stats = {}
+    chunks = list(DataLoader.iter_jsonl(str(jsonl_path), chunksize=3, stats=stats))
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    assert [e.event_id for c in chunks for e in c] == [e.event_id for e in events]
+    assert stats["malformed"] == 2
+
+    # Tiny reads force elements to straddle buffer boundaries
+    monkeypatch.setattr(loader, "JSON_READ_SIZE", 7)
+    array_path = tmp_path / "events.json"
+    records.insert(2, {"event_id": "missing-fields"})
+    array_path.write_text(json.dumps(records, indent=2))
+    stats = {}
+    chunks = list(DataLoader.iter_json_array(str(array_path), chunksize=4, stats=stats))
+    assert [e.event_id for c in chunks for e in c] == [e.event_id for e in events]
+    assert stats["malformed"] == 1
+
+    array_path.write_text(json.dumps(records[:2])[:-1] + ', {"event_id": ')
+    stats = {}
+    chunks = list(DataLoader.iter_json_array(str(array_path), stats=stats))
+    assert [e.event_id for c in chunks for e in c] == [e.event_id for e in events[:2]]
+    assert stats["malformed"] == 1
+
+def test_pipeline_parallel_matches_serial():
+    """Sharded classification on a process pool merges back in order."""
+    from src.models.baseline import TFIDFClassifier
+    from src.models.rules import RuleBasedDetector
+    from src.models.pipeline import ClassificationPipeline
+
+    gen = SyntheticLogGenerator(seed=12)
+    model = TFIDFClassifier()
+    model.train(gen.generate_events(200))
+    events = gen.generate_events(60)
+    copies = [e.model_copy(deep=True) for e in events]
+
+    serial = ClassificationPipeline(RuleBasedDetector(), model).classify(events)
+    parallel_pipeline = ClassificationPipeline(RuleBasedDetector(), model, workers=2, shard_size=7)
+    try:
+        parallel = parallel_pipeline.classify(copies)
+    finally:
+        parallel_pipeline.shutdown()
+
+    assert parallel == serial
+    assert [e.model_dump() for e in copies] == [e.model_dump() for e in events]
+    # One shard per worker, none smaller than shard_size
+    assert [len(s) for s in parallel_pipeline._shards(list(range(60)))] == [30, 30]
+    parallel_pipeline.shard_size = 40
+    assert [len(s) for s in parallel_pipeline._shards(list(range(60)))] == [40, 20]
+
+def test_model_artifact_round_trip(tmp_path):
+    """Artifacts reload memory-mapped with identical predictions and reject corruption."""
+    import pickle
+    import numpy as np
+    from src.models.baseline import TFIDFClassifier
+    from src.models.artifacts import ModelArtifactError
+
+    gen = SyntheticLogGenerator(seed=13)
+    model = TFIDFClassifier()
+    model.train(gen.generate_events(200))
+    path = str(tmp_path / "tfidf" / "v1")
+    model.save_artifact(path, version="v1")
+
+    loaded = TFIDFClassifier()
+    manifest = loaded.load_artifact(path)
+    assert manifest["model_version"] == loaded.version == "v1"
+    assert isinstance(loaded.pipeline.named_steps['clf'].coef_, np.memmap)
+    texts = model._extract_features(gen.generate_events(30))
+    assert np.allclose(loaded.predict_proba(texts), model.predict_proba(texts))
+    assert loaded.classes == model.classes
+
+    # Pickles carry only the path, so workers map the same files
+    assert len(pickle.dumps(loaded)) < 500
+    assert np.allclose(pickle.loads(pickle.dumps(loaded)).predict_proba(texts), model.predict_proba(texts))
+
+    with open(tmp_path / "tfidf" / "v1" / "coef.npy", "r+b") as f:
+        f.seek(-8, 2)
+        f.write(b"corrupt!")
+    with pytest.raises(ModelArtifactError):
+        TFIDFClassifier().load_artifact(path)
+    with pytest.raises(ModelArtifactError):
+        TFIDFClassifier().load_artifact(str(tmp_path / "missing"))
+
+def test_hashing_classifier_learns_online():
+    """partial_fit on streamed batches gives the same interface as TFIDFClassifier."""
+    from src.models.online import HashingClassifier
+
+    gen = SyntheticLogGenerator(seed=14)
+    model = HashingClassifier()
+    assert model.predict(["GET /"]) == ["Normal"]
+    assert model.predict_proba(["GET /"]).shape == (1, 2)
+
+    versions = set()
+    for _ in range(5):
+        assert model.partial_fit(gen.generate_events(200)) == 200
+        versions.add(model.version)
+    assert len(versions) == 5
+
+    test_events = gen.generate_events(200)
+    texts = model._extract_features(test_events)
+    predictions = model.predict(texts)
+    accuracy = sum(p == e.attack_type for p, e in zip(predictions, test_events)) / len(test_events)
+    assert accuracy > 0.9
+    assert model.predict_proba(texts).shape == (200, len(model.classes))
+
+    unlabeled = gen.generate_events(3)
+    for e in unlabeled:
+        e.attack_type = "Analyzing..."
+    assert model.partial_fit(unlabeled) == 0
@@ -0,0 +1,27 @@
+from benchmarks.suite import run, compare
+
+
+def test_benchmark_suite_runs(tmp_path):
+    results = run([300], workdir=str(tmp_path), train_limit=300, requests=2)
+    metrics = results["results"]["300"]
+    assert metrics["loader.csv.seconds"] > 0
+    assert metrics["rules.events_per_second"] > 0
+    assert metrics["tfidf.train_events"] == 300
+    assert metrics["api.upload.events_per_second"] > 0
+    for endpoint in ("events", "timeline", "top_ips", "storyline"):
+        assert metrics[f"api.{endpoint}.p95_ms"] >= metrics[f"api.{endpoint}.p50_ms"]
+
+
+def test_benchmark_compare_flags_regressions():
+    baseline = {"results": {"1000": {
+        "rules.events_per_second": 1000.0, "api.events.p95_ms": 10.0,
+        "rules.seconds": 1.0, "tfidf.train_events": 1000,
+    }}}
+    current = {"results": {"1000": {
+        "rules.events_per_second": 700.0, "api.events.p95_ms": 11.0,
+        "rules.seconds": 1.4, "tfidf.train_events": 2000,
+    }, "5000": {"rules.events_per_second": 1.0}}}
+    regressions = compare(current, baseline, threshold=0.2)
+    assert [(r["size"], r["metric"]) for r in regressions] == [("1000", "rules.events_per_second")]
+    assert regressions[0]["change"] == -0.3
+    assert compare(current, baseline, threshold=0.5) == []
@@ -0,0 +1,413 @@
+import numpy as np
+from src.generation.synthetic import SyntheticLogGenerator
+from src.storage.event_store import EventStore
+
+def test_store_round_trip():
+    """Events read back from the columnar store match what was appended."""
+    events = SyntheticLogGenerator(seed=1).generate_events(50)
+    store = EventStore()
+    store.append(events)
+
+    assert len(store) == 50
+    for row in (0, 17, 49):
+        assert store.get(row).model_dump() == events[row].model_dump()
+
+def scan_events(events, source_ip=None, attack_type=None, is_successful=None):
+    """Row ids of matching events, newest first, by a plain scan of the input."""
+    matches = [
+        (e.timestamp, row) for row, e in enumerate(events)
+        if (not source_ip or e.source_ip == source_ip)
+        and (not attack_type or e.attack_type == attack_type)
+        and (is_successful is None or e.is_successful == is_successful)
+    ]
+    return [row for _, row in sorted(matches, reverse=True)]
+
+def test_store_filters_and_order():
+    events = SyntheticLogGenerator(seed=2).generate_events(200)
+    store = EventStore()
+    store.append(events)
+
+    ip = events[0].source_ip
+    rows = store.query(source_ip=ip, is_successful=False, limit=1000)
+    assert rows.tolist() == scan_events(events, source_ip=ip, is_successful=False)
+    assert [store.get(r).model_dump() for r in rows] == [events[r].model_dump() for r in rows]
+
+    # Unknown values match nothing
+    assert len(store.query(attack_type="NoSuchType")) == 0
+
+def test_store_top_ips():
+    events = SyntheticLogGenerator(seed=3).generate_events(300)
+    store = EventStore()
+    store.append(events)
+
+    counts = {}
+    for e in events:
+        if e.attack_type != "Normal":
+            counts[e.source_ip] = counts.get(e.source_ip, 0) + 1
+    top = store.attackers.top(3)
+    assert [c for _, c in top] == sorted(counts.values(), reverse=True)[:3]
+    assert all(counts[ip] == c for ip, c in top)
+    assert store.attackers.exact
+
+    sqli = {}
+    for e in events:
+        if e.attack_type == "SQLi":
+            sqli[e.source_ip] = sqli.get(e.source_ip, 0) + 1
+    assert dict(store.attackers.top(100, "SQLi")) == sqli
+
+def test_top_k_tracker_bounded():
+    """Heavy hitters survive a flood of one-off keys in bounded memory."""
+    from src.storage.heavy_hitters import TopKTracker
+    tracker = TopKTracker(capacity=50)
+    for i in range(5000):
+        tracker.add(f"10.0.{i // 256}.{i % 256}")
+        if i % 10 == 0:
+            tracker.add("6.6.6.6", 3)
+            tracker.add("7.7.7.7", 2)
+    assert len(tracker) <= 50
+    assert not tracker.exact
+    top = tracker.top(2)
+    assert [ip for ip, _ in top] == ["6.6.6.6", "7.7.7.7"]
+    assert top[0][1] >= 1500
+
+def test_store_indexed_query_matches_scan():
+    gen = SyntheticLogGenerator(seed=4)
+    events = gen.generate_events(300)
+    # Second batch lands out of order to exercise the merge path
+    late = gen.generate_events(100)
+    for e in late:
+        e.timestamp = e.timestamp.replace(year=e.timestamp.year - 1)
+    store = EventStore()
+    store.append(events)
+    store.append(late)
+
+    filters = [
+        {},
+        {"source_ip": events[0].source_ip},
+        {"attack_type": "Normal", "is_successful": False},
+        {"source_ip": events[1].source_ip, "attack_type": "SQLi"},
+    ]
+    for f in filters:
+        full = scan_events(events + late, **f)
+        for offset, limit in ((0, 10), (5, 20), (len(full) - 3, 10)):
+            page = store.query(**f, offset=max(offset, 0), limit=limit)
+            assert page.tolist() == full[max(offset, 0):max(offset, 0) + limit]
+
+def test_timeline_rollup_matches_events():
+    events = SyntheticLogGenerator(seed=5).generate_events(500)
+    store = EventStore()
+    store.append(events[:200])
+    store.append(events[200:])
+
+    for granularity, fmt in (("minute", "%Y-%m-%d %H:%M"), ("hour", "%Y-%m-%d %H"), ("day", "%Y-%m-%d")):
+        expected = {}
+        for e in events:
+            counts = expected.setdefault(e.timestamp.strftime(fmt), [0, 0])
+            counts[0 if e.is_successful else 1] += 1
+        series = store.timeline.series(granularity)
+        got = {
+            np.datetime64(b, 'us').item().strftime(fmt): [s, a] for b, s, a in series
+        }
+        assert got == expected
+        assert [b for b, _, _ in series] == sorted(b for b, _, _ in series)
+
+    # Bounds are inclusive of the bucket containing start
+    series = store.timeline.series("hour")
+    bounded = store.timeline.series("hour", start_us=series[1][0] + 1, end_us=series[2][0])
+    assert bounded == series[1:3]
+
+    store.clear()
+    assert store.timeline.series("day") == []
+
+def test_store_lookup_by_id():
+    events = SyntheticLogGenerator(seed=6).generate_events(20)
+    store = EventStore()
+    matches = [{"SQLi": ["Classic SQLi", "SQL Comment"]} if i % 2 else {} for i in range(20)]
+    store.append(events, matches)
+
+    row = store.find_row(events[5].event_id)
+    assert row == 5
+    assert store.get_rule_matches(row) == {"SQLi": ["Classic SQLi", "SQL Comment"]}
+    assert store.get_rule_matches(4) == {}
+    assert store.find_row("missing") is None
+
+    store.clear()
+    assert store.find_row(events[5].event_id) is None
+
+def test_persistent_store_survives_restart(tmp_path):
+    """Segments reload into an identical store; partial writes are dropped."""
+    import os
+    from src.storage.persistent import PersistentEventStore
+
+    events = SyntheticLogGenerator(seed=7).generate_events(60)
+    events[3].payload = None
+    matches = [{"XSS": ["Script Tag"]} if i % 3 == 0 else {} for i in range(60)]
+    store = PersistentEventStore(str(tmp_path))
+    store.load()
+    store.append(events[:25], matches[:25])
+    store.append(events[25:], matches[25:])
+    assert len(store.segments) == 2
+
+    # A segment that was still being written when the process died
+    os.makedirs(tmp_path / "seg-00000003.tmp")
+
+    reloaded = PersistentEventStore(str(tmp_path))
+    reloaded.load()
+    assert len(reloaded) == 60
+    assert not os.path.exists(tmp_path / "seg-00000003.tmp")
+    for row in range(60):
+        assert reloaded.get(row).model_dump() == store.get(row).model_dump()
+        assert reloaded.get_rule_matches(row) == store.get_rule_matches(row)
+    assert list(reloaded.query(limit=20)) == list(store.query(limit=20))
+    ip = events[0].source_ip
+    assert list(reloaded.query(source_ip=ip)) == list(store.query(source_ip=ip))
+    assert dict(reloaded.attackers.top(100)) == dict(store.attackers.top(100))
+    assert reloaded.find_row(events[40].event_id) == 40
+
+    # Appending after a reload continues the existing dictionaries
+    more = SyntheticLogGenerator(seed=8).generate_events(10)
+    reloaded.append(more)
+    again = PersistentEventStore(str(tmp_path))
+    again.load()
+    assert [again.get(r).model_dump() for r in range(60, 70)] == [e.model_dump() for e in more]
+
+    again.clear()
+    assert os.listdir(tmp_path) == []
+    empty = PersistentEventStore(str(tmp_path))
+    empty.load()
+    assert len(empty) == 0
+
+def test_retention_evicts_oldest():
+    """Limits evict the oldest events and keep indexes and aggregates consistent."""
+    events = SyntheticLogGenerator(seed=9).generate_events(300)
+    store = EventStore(max_events=100)
+    for start in range(0, 300, 50):
+        store.append(events[start:start + 50])
+    assert len(store) <= 100
+    assert store.evicted_events == 300 - len(store) and store.eviction_runs > 0
+
+    newest = sorted(events, key=lambda e: e.timestamp)[-len(store):]
+    reference = EventStore()
+    reference.append(newest)
+    assert {store.get(r).event_id for r in store.time_order.rows} == {e.event_id for e in newest}
+    # Survivors keep their ids; the evicted head of the columns is released
+    assert store.find_row(events[-1].event_id) == 299
+    assert store.base == 300 - len(store)
+    assert store.timeline.series("minute") == reference.timeline.series("minute")
+    assert dict(store.attackers.top(1000)) == dict(reference.attackers.top(1000))
+    assert store.find_row(newest[0].event_id) is not None
+    assert all(store.find_row(e.event_id) is None for e in events if e not in newest)
+    for ip in {e.source_ip for e in newest}:
+        got = [store.get(r).event_id for r in store.query(source_ip=ip, limit=1000)]
+        want = [reference.get(r).event_id for r in reference.query(source_ip=ip, limit=1000)]
+        assert got == want
+
+    # Age is measured back from the newest event
+    span = (newest[-1].timestamp - newest[0].timestamp).total_seconds()
+    store.max_age_seconds = int(span / 2)
+    store.enforce_retention()
+    ts = store.time_order.ts
+    assert ts.max() - ts.min() <= store.max_age_seconds * 10**6
+
+    store.max_bytes = store.nbytes() // 2
+    store.enforce_retention()
+    assert store.nbytes() <= store.max_bytes
+
+def test_retention_out_of_insertion_order():
+    """Older events uploaded later are evicted first; storage follows when the head goes."""
+    gen = SyntheticLogGenerator(seed=14)
+    recent, old = gen.generate_events(60), gen.generate_events(20)
+    for e in old:
+        e.timestamp = e.timestamp.replace(year=e.timestamp.year - 1)
+    store = EventStore(max_events=70)
+    store.append(recent)
+    store.append(old)
+    newest = sorted(recent + old, key=lambda e: e.timestamp)[-len(store):]
+    assert {store.get(r).event_id for r in store.time_order.rows} == {e.event_id for e in newest}
+    assert sum(store.find_row(e.event_id) is not None for e in old) == len(store) - 60
+    assert store.query(limit=1000).tolist() == store.time_order.rows[::-1].tolist()
+    # The head of the columns is still live, so nothing is released yet
+    assert store.base == 0 and len(store.event_id) == 80
+
+def test_persistent_retention_drops_segments(tmp_path):
+    from src.storage.persistent import PersistentEventStore
+
+    gen = SyntheticLogGenerator(seed=10)
+    events = gen.generate_events(120)
+    store = PersistentEventStore(str(tmp_path), max_events=50)
+    for start in range(0, 120, 30):
+        store.append(events[start:start + 30])
+    # Segments whose rows were all evicted are gone; the rest is untouched
+    assert store.segments == ["seg-00000003", "seg-00000004"]
+
+    # Rows evicted out of insertion order stay evicted across a restart
+    old = gen.generate_events(10)
+    for e in old:
+        e.timestamp = e.timestamp.replace(year=e.timestamp.year - 1)
+    store.append(old)
+    reloaded = PersistentEventStore(str(tmp_path), max_events=50)
+    reloaded.load()
+    assert reloaded.time_order.rows.tolist() == store.time_order.rows.tolist()
+    assert [reloaded.get(r).model_dump() for r in reloaded.time_order.rows] == \
+        [store.get(r).model_dump() for r in store.time_order.rows]
+    assert all(reloaded.find_row(e.event_id) is None for e in old)
+
+def test_persistent_restart_after_mostly_evicted_segment(tmp_path):
+    """A segment whose rows are mostly evicted reloads with its live tail."""
+    from src.storage.persistent import PersistentEventStore
+
+    events = SyntheticLogGenerator(seed=13).generate_events(100)
+    store = PersistentEventStore(str(tmp_path), max_events=20)
+    store.load()
+    store.append(events)
+    assert len(store.segments) == 1 and store.base > 50
+
+    reloaded = PersistentEventStore(str(tmp_path), max_events=20)
+    reloaded.load()
+    assert reloaded.base == store.base
+    assert reloaded.time_order.rows.tolist() == store.time_order.rows.tolist()
+    assert [reloaded.get(r).model_dump() for r in reloaded.time_order.rows] == \
+        [store.get(r).model_dump() for r in store.time_order.rows]
+
+    # Merged segments, evictions and restarts interleaved
+    gen = SyntheticLogGenerator(seed=14)
+    for size in (3, 40, 7, 1, 25, 60, 2, 9) * 4:
+        reloaded.append(gen.generate_events(size))
+        if size < 5:
+            reloaded = PersistentEventStore(str(tmp_path), max_events=20)
+            reloaded.load()
+    again = PersistentEventStore(str(tmp_path), max_events=20)
+    again.load()
+    assert [again.get(r).model_dump() for r in again.time_order.rows] == \
+        [reloaded.get(r).model_dump() for r in reloaded.time_order.rows]
+
+def test_persistent_small_uploads_are_merged(tmp_path):
+    """Many small uploads don't leave one segment each."""
+    import os
+    from src.storage.persistent import PersistentEventStore
+
+    events = SyntheticLogGenerator(seed=12).generate_events(600)
+    store = PersistentEventStore(str(tmp_path), max_events=400)
+    for start in range(0, 600, 2):
+        store.append(events[start:start + 2])
+    assert len(store.segments) <= store.MAX_SEGMENTS
+    assert sorted(n for n in os.listdir(tmp_path) if n.startswith("seg-")) == store.segments
+    on_disk = sum(
+        os.path.getsize(os.path.join(tmp_path, name, f))
+        for name in store.segments for f in os.listdir(os.path.join(tmp_path, name)))
+    assert store.disk_bytes() == on_disk
+
+    reloaded = PersistentEventStore(str(tmp_path), max_events=400)
+    reloaded.load()
+    assert reloaded.segments == store.segments
+    assert [reloaded.get(r).model_dump() for r in reloaded.time_order.rows] == \
+        [store.get(r).model_dump() for r in store.time_order.rows]
+    assert reloaded.get_rule_matches(int(reloaded.time_order.rows[-1])) == \
+        store.get_rule_matches(int(store.time_order.rows[-1]))
+
+def test_cursor_pages_are_stable():
+    """Keyset pages continue after the cursor even when new rows arrive."""
+    from datetime import timedelta
+
+    events = SyntheticLogGenerator(seed=11).generate_events(200)
+    # Force timestamp ties so the row tiebreak matters
+    for e in events[::3]:
+        e.timestamp = events[0].timestamp
+    store = EventStore()
+    store.append(events)
+    expected = list(store.query(limit=1000))
+    first = store.query(limit=50)
+    cursor = store.cursor_of(int(first[-1]))
+    # Newer events land between pages without shifting the next one
+    newer = SyntheticLogGenerator(seed=12).generate_events(30)
+    for e in newer:
+        e.timestamp = max(ev.timestamp for ev in events) + timedelta(minutes=1)
+    store.append(newer)
+    second = store.query(limit=50, cursor=cursor)
+    assert list(first) + list(second) == expected[:100]
+
+    ip = events[1].source_ip
+    expected_ip = list(store.query(source_ip=ip, attack_type=events[1].attack_type, limit=1000, descending=False))
+    pages, cursor = [], None
+    while True:
+        page = store.query(source_ip=ip, attack_type=events[1].attack_type, limit=3, cursor=cursor, descending=False)
+        pages += list(page)
+        if len(page) < 3:
+            break
+        cursor = store.cursor_of(int(page[-1]))
+    assert pages == expected_ip
+
+    # Re-uploading a file duplicates its event ids; every row is still visited once
+    dup = EventStore()
+    batch = SyntheticLogGenerator(seed=15).generate_events(5)
+    dup.append(batch)
+    dup.append(batch)
+    for descending in (True, False):
+        seen, cursor = [], None
+        while True:
+            page = dup.query(limit=1, cursor=cursor, descending=descending)
+            if len(page) == 0:
+                break
+            seen += page.tolist()
+            cursor = dup.cursor_of(int(page[-1]))
+        assert seen == dup.query(limit=100, descending=descending).tolist()
+        assert sorted(seen) == list(range(10))
+
+def test_scan_continues_across_changes():
+    """A scan read page by page keeps its place through inserts and eviction."""
+    gen = SyntheticLogGenerator(seed=16)
+    events = gen.generate_events(200)
+    store = EventStore()
+    store.append(events)
+    ip = events[0].source_ip
+    expected = store.query(source_ip=ip, limit=1000).tolist()
+
+    scan = store.scan(source_ip=ip)
+    seen = scan.next_page(0, 5).tolist()
+    # Older events for the same IP land mid-posting and shift its positions
+    late = gen.generate_events(50)
+    for e in late:
+        e.source_ip = ip
+        e.timestamp = e.timestamp.replace(year=e.timestamp.year - 1)
+    store.append(late)
+    while True:
+        page = scan.next_page(0, 5)
+        if len(page) == 0:
+            break
+        seen += page.tolist()
+    assert seen == expected + store.query(source_ip=ip, limit=1000).tolist()[len(expected):]
+
+    # Evicting the head of the posting mid-scan drops only the evicted rows
+    scan = store.scan(source_ip=ip, descending=False)
+    first = scan.next_page(0, 3).tolist()
+    store.max_events = len(store) - 20
+    store.enforce_retention()
+    rest = []
+    while True:
+        page = scan.next_page(0, 4)
+        if len(page) == 0:
+            break
+        rest += page.tolist()
+    assert rest == [r for r in store.query(source_ip=ip, limit=1000, descending=False).tolist()
+                    if r not in first and store.cursor_of(r) > store.cursor_of(first[-1])]
+
+def test_storyline_time_window():
+    """Per-IP queries bounded by time match a filtered scan."""
+    from src.storage.event_store import to_epoch_us
+
+    events = SyntheticLogGenerator(seed=13).generate_events(400)
+    store = EventStore()
+    store.append(events)
+    ip = events[0].source_ip
+    ordered = sorted(
+        (e for e in events if e.source_ip == ip), key=lambda e: e.timestamp)
+    start, end = ordered[len(ordered) // 4].timestamp, ordered[3 * len(ordered) // 4].timestamp
+
+    for attack_type in (None, events[0].attack_type):
+        expected = [e.event_id for e in ordered
+                    if start <= e.timestamp <= end and attack_type in (None, e.attack_type)]
+        rows = store.query(source_ip=ip, attack_type=attack_type, limit=1000, descending=False,
+                           start_us=to_epoch_us(start), end_us=to_epoch_us(end))
+        assert sorted(store.get(r).event_id for r in rows) == sorted(expected)
+        ts = store.timestamp.values[rows]
+        assert (np.diff(ts) >= 0).all()